@@ -0,0 +1,68 @@
+"""
+Per-page cost of finding a body's encoding, old path vs new.
+
+  detect   statistical detection over the whole body (charset_normalizer,
+           what requests' .text / older aiohttp do without a header charset)
+  dammit   bs4.UnicodeDammit, what BeautifulSoup runs when handed bytes
+  resolve  CharsetResolver (BOM / header / 4 KB meta prescan / host cache)
+           plus the single decode the parser now does
+
+Usage:
+    python -m benchmarks.charset_cost --pages 200 --page-size 20000
+"""
+import argparse
+import time
+
+from benchmarks.synthetic_site import SiteConfig, SyntheticSite
+from core.charset import CharsetResolver
+
+
+def make_pages(count, page_size, charset):
+    site = SyntheticSite(SiteConfig(page_size=page_size, charset=charset))
+    return [
+        site._render([f"/page/{n + i}" for i in range(10)]).encode("utf-8")
+        for n in range(count)
+    ]
+
+
+def per_page_us(fn, pages):
+    start = time.perf_counter()
+    for body in pages:
+        fn(body)
+    return (time.perf_counter() - start) / len(pages) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Charset resolution cost per page")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--page-size", type=int, default=20_000)
+    args = parser.parse_args()
+
+    resolver = CharsetResolver()
+
+    def resolve(body):
+        body.decode(resolver.resolve(body, None, "bench.local"), errors="replace")
+
+    methods = {"resolve": resolve}
+    try:
+        from bs4 import UnicodeDammit
+        methods["dammit"] = lambda body: UnicodeDammit(body, is_html=True).unicode_markup
+    except ImportError:
+        pass
+    try:
+        from charset_normalizer import from_bytes
+        methods["detect"] = lambda body: str(from_bytes(body).best())
+    except ImportError:
+        pass
+
+    for charset in ("meta", "none"):
+        pages = make_pages(args.pages, args.page_size, charset)
+        for name, fn in sorted(methods.items()):
+            print(
+                f"[CHARSET] pages={charset:<4} {name:<8} "
+                f"{per_page_us(fn, pages):9.1f} µs/page"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,342 @@
+"""
+End-to-end crawl benchmark against the local synthetic site.
+
+Starts benchmarks/synthetic_site.py in a subprocess, then runs each
+crawler in its own subprocess (so peak RSS belongs to the crawler alone)
+and reports URLs/sec, per-stage p50/p99, peak RSS and DB size.
+
+Usage:
+    python -m benchmarks.crawl_bench --pages 5000 --out bench.json
+    python -m benchmarks.crawl_bench --pages 5000 --compare bench.json
+
+A captured crawl (main_async.py --record) can be used as input instead
+of the synthetic site:
+    python -m benchmarks.crawl_bench --replay capture.db --start-url https://example.com/
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from urllib.parse import urlparse
+
+from benchmarks.synthetic_site import SiteConfig
+
+CRAWLERS = ("async", "sync")
+
+
+def db_size(db_path):
+    return sum(
+        os.path.getsize(p)
+        for p in (db_path, db_path + "-wal", db_path + "-shm")
+        if os.path.exists(p)
+    )
+
+
+def peak_rss_bytes():
+    # Linux reports ru_maxrss in KiB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+# -------------------------------------------------
+# SINGLE CRAWL (runs inside a child process)
+# -------------------------------------------------
+
+async def crawl_async(args, start_url, domain):
+    from core.crawler_async import AsyncCrawler
+    from core.fetcher_async import AsyncFetcher
+    from core.parser import Parser
+    from core.policies import CrawlPolicy
+    from core.traps import TrapDetector
+    from core.transport import HTTPTransport, RecordingTransport, ReplayTransport, ResponseCache
+    from storage.sqlite_store_async import AsyncSQLiteStore
+    from utils.concurrency import ConcurrencyController
+    from utils.metrics import Metrics
+    from config import USER_AGENT
+
+    transport = None
+    if args.record:
+        transport = RecordingTransport(
+            HTTPTransport({"User-Agent": USER_AGENT}), ResponseCache(args.record)
+        )
+    elif args.replay:
+        transport = ReplayTransport(ResponseCache(args.replay))
+
+    ctrl = ConcurrencyController(
+        initial=args.concurrency, min_c=1, max_c=args.concurrency, window=20
+    )
+    store = AsyncSQLiteStore(args.db)
+    metrics = Metrics(interval=3600)
+    crawler = AsyncCrawler(
+        store=store,
+        fetcher=AsyncFetcher(USER_AGENT, ctrl, transport=transport),
+        parser=Parser(domain),
+        policy=CrawlPolicy(max_depth=args.max_depth),
+        metrics=metrics,
+        worker_count=args.workers,
+        traps=TrapDetector() if args.trap_guard else None,
+    )
+
+    start = time.perf_counter()
+    await crawler.run(start_url)
+    elapsed = time.perf_counter() - start
+
+    visited, errors = await metrics.snapshot()
+    return {
+        "visited": visited,
+        "errors": errors,
+        "elapsed_secs": elapsed,
+        "stages": crawler.stages.summary(),
+    }
+
+
+def crawl_sync(args, start_url, domain):
+    from core.crawler import Crawler
+    from core.fetcher import Fetcher
+    from core.parser import Parser
+    from core.policies import CrawlPolicy
+    from core.traps import TrapDetector
+    from storage.sqlite_store import SQLiteStore
+    from config import USER_AGENT
+
+    store = SQLiteStore(args.db)
+    crawler = Crawler(
+        store=store,
+        fetcher=Fetcher(USER_AGENT),
+        parser=Parser(domain),
+        delay=0,
+        auto_commit=3600,
+        policy=CrawlPolicy(max_depth=args.max_depth),
+        traps=TrapDetector() if args.trap_guard else None,
+    )
+
+    start = time.perf_counter()
+    crawler.run(start_url)
+    elapsed = time.perf_counter() - start
+    store.commit()
+    store.close()
+
+    summary = crawler.stages.summary()
+    fetched = summary.get("fetch", {}).get("count", 0)
+    return {
+        "visited": crawler.processed,
+        "errors": crawler.processed - fetched,
+        "elapsed_secs": elapsed,
+        "stages": summary,
+    }
+
+
+def run_one(args):
+    if args.start_url:
+        start_url = args.start_url
+        domain = urlparse(start_url).netloc
+    else:
+        domain = f"127.0.0.1:{args.port}"
+        start_url = f"http://{domain}/page/0"
+
+    if args.run_one == "async":
+        result = asyncio.run(crawl_async(args, start_url, domain))
+    else:
+        result = crawl_sync(args, start_url, domain)
+
+    elapsed = result["elapsed_secs"]
+    result.update(
+        urls_per_sec=round(result["visited"] / elapsed, 2) if elapsed > 0 else 0.0,
+        elapsed_secs=round(elapsed, 2),
+        peak_rss_bytes=peak_rss_bytes(),
+        db_bytes=db_size(args.db),
+    )
+
+    with open(args.result_file, "w") as f:
+        json.dump(result, f)
+
+
+# -------------------------------------------------
+# ORCHESTRATION
+# -------------------------------------------------
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for_port(port, timeout=15):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"synthetic site did not start on port {port}")
+
+
+def site_argv(config):
+    argv = []
+    for key, value in config.as_dict().items():
+        argv += [f"--{key.replace('_', '-')}", str(value)]
+    return argv
+
+
+def run_suite(args):
+    config = SiteConfig.from_args(args)
+    port = free_port()
+    server = None
+
+    if args.replay:
+        # replayed crawls need neither the synthetic site nor the network
+        if not args.start_url:
+            raise SystemExit("--replay requires --start-url")
+        args.crawlers = ["async"]
+    else:
+        server = subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.synthetic_site", "--port", str(port)]
+            + site_argv(config)
+        )
+    results = {}
+
+    try:
+        if server:
+            wait_for_port(port)
+
+        with tempfile.TemporaryDirectory(prefix="crawl_bench_") as workdir:
+            for name in args.crawlers:
+                db = os.path.join(workdir, f"{name}.db")
+                result_file = os.path.join(workdir, f"{name}.json")
+
+                subprocess.run(
+                    [
+                        sys.executable, "-m", "benchmarks.crawl_bench",
+                        "--run-one", name,
+                        "--port", str(port),
+                        "--db", db,
+                        "--result-file", result_file,
+                        "--workers", str(args.workers),
+                        "--concurrency", str(args.concurrency),
+                        "--max-depth", str(args.max_depth),
+                    ]
+                    + passthrough(args, name),
+                    stdout=subprocess.DEVNULL,
+                    check=True,
+                )
+
+                with open(result_file) as f:
+                    results[name] = json.load(f)
+                print_result(name, results[name])
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "site": {"replay": args.replay, "start_url": args.start_url}
+        if args.replay else config.as_dict(),
+        "settings": {
+            "workers": args.workers,
+            "concurrency": args.concurrency,
+            "max_depth": args.max_depth,
+            "trap_guard": args.trap_guard,
+        },
+        "results": results,
+    }
+
+
+def passthrough(args, name):
+    argv = []
+    if args.start_url:
+        argv += ["--start-url", args.start_url]
+    if args.trap_guard:
+        argv += ["--trap-guard"]
+    # only the async crawler has pluggable transports
+    if name == "async" and args.record:
+        argv += ["--record", args.record]
+    if name == "async" and args.replay:
+        argv += ["--replay", args.replay]
+    return argv
+
+
+def print_result(name, r):
+    print(
+        f"[BENCH] {name:<5} visited={r['visited']} errors={r['errors']} "
+        f"rate={r['urls_per_sec']:.2f} urls/sec "
+        f"rss={r['peak_rss_bytes'] / 2**20:.1f}MiB db={r['db_bytes'] / 2**20:.1f}MiB"
+    )
+    for stage, s in r["stages"].items():
+        print(f"        {stage:<8} p50={s['p50_ms']}ms p99={s['p99_ms']}ms n={s['count']}")
+
+
+def compare(report, baseline_path, threshold):
+    """
+    Returns False if any crawler's throughput dropped by more than threshold.
+    """
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    ok = True
+    for name, current in report["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if not before or not before["urls_per_sec"]:
+            continue
+
+        change = current["urls_per_sec"] / before["urls_per_sec"] - 1
+        rss_change = current["peak_rss_bytes"] / before["peak_rss_bytes"] - 1
+        flag = "REGRESSION" if change < -threshold else "ok"
+        ok = ok and flag == "ok"
+        print(
+            f"[COMPARE] {name:<5} {before['urls_per_sec']:.2f} → "
+            f"{current['urls_per_sec']:.2f} urls/sec ({change:+.1%}), "
+            f"rss {rss_change:+.1%}  {flag}"
+        )
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end crawl benchmark")
+    SiteConfig.add_arguments(parser)
+    parser.add_argument("--crawlers", nargs="+", choices=CRAWLERS, default=list(CRAWLERS))
+    parser.add_argument("--workers", type=int, default=25)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--max-depth", type=int, default=8)
+    parser.add_argument("--trap-guard", action="store_true", help="Run with the crawl-trap detector")
+    parser.add_argument("--record", help="Record async crawl responses to this cache")
+    parser.add_argument("--replay", help="Replay async crawl from this cache (no server)")
+    parser.add_argument("--start-url", help="Start URL (defaults to the synthetic site root)")
+    parser.add_argument("--out", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Baseline JSON to compare against")
+    parser.add_argument(
+        "--threshold", type=float, default=0.10,
+        help="Allowed throughput drop before --compare fails",
+    )
+
+    # internal: single crawl inside a child process
+    parser.add_argument("--run-one", choices=CRAWLERS, help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--db", help=argparse.SUPPRESS)
+    parser.add_argument("--result-file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        run_one(args)
+        return
+
+    report = run_suite(args)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"[BENCH] Results saved → {args.out}")
+
+    if args.compare and not compare(report, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
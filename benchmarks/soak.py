@@ -0,0 +1,148 @@
+"""
+Soak test: long AsyncCrawler run against the synthetic site with a
+ResourceGovernor attached, sampling RSS to show it stays flat.
+
+Exits non-zero if RSS in the last third of the run grew more than
+--tolerance over the first third (after warm-up).
+
+Usage:
+    python -m benchmarks.soak --pages 2000000 --max-rss-mb 512
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.crawl_bench import free_port, site_argv, wait_for_port
+from benchmarks.synthetic_site import SiteConfig
+from core.crawler_async import AsyncCrawler
+from core.fetcher_async import AsyncFetcher
+from core.parser import Parser
+from core.policies import CrawlPolicy
+from storage.sqlite_store_async import AsyncSQLiteStore
+from utils.concurrency import ConcurrencyController
+from utils.governor import ResourceGovernor, current_rss_bytes
+from utils.metrics import Metrics
+from config import USER_AGENT
+
+
+async def soak(args, port, db_path):
+    domain = f"127.0.0.1:{port}"
+    store = AsyncSQLiteStore(db_path, batch_size=500)
+    metrics = Metrics(interval=args.sample_secs * 6)
+    governor = ResourceGovernor(
+        max_rss_mb=args.max_rss_mb,
+        max_frontier=args.max_frontier,
+        max_inflight_mb=args.max_inflight_mb,
+    )
+    crawler = AsyncCrawler(
+        store=store,
+        fetcher=AsyncFetcher(
+            USER_AGENT,
+            ConcurrencyController(initial=args.concurrency, max_c=args.concurrency),
+        ),
+        parser=Parser(domain),
+        policy=CrawlPolicy(max_depth=args.max_depth),
+        metrics=metrics,
+        worker_count=args.workers,
+        governor=governor,
+    )
+
+    start = time.time()
+    task = asyncio.create_task(crawler.run(f"http://{domain}/page/0"))
+    samples = []
+
+    while not task.done():
+        await asyncio.sleep(args.sample_secs)
+        visited, _ = await metrics.snapshot()
+        rss = current_rss_bytes()
+        samples.append({
+            "t": round(time.time() - start, 1),
+            "visited": visited,
+            "rss_bytes": rss,
+            "frontier": store.queue_len,
+        })
+        print(
+            f"[SOAK] t={samples[-1]['t']}s visited={visited} "
+            f"rss={rss / 2**20:.1f}MiB frontier={store.queue_len}"
+        )
+        if visited >= args.target or time.time() - start >= args.duration:
+            break
+
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    return samples, governor
+
+
+def verdict(samples, warmup, tolerance):
+    steady = samples[int(len(samples) * warmup):]
+    if len(steady) < 3:
+        return None, True
+
+    third = max(1, len(steady) // 3)
+    early = statistics.median(s["rss_bytes"] for s in steady[:third])
+    late = statistics.median(s["rss_bytes"] for s in steady[-third:])
+    growth = late / early - 1
+    return growth, growth <= tolerance
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory soak test")
+    SiteConfig.add_arguments(parser)
+    parser.set_defaults(pages=2_000_000, latency="none", page_size=8_000)
+    parser.add_argument("--target", type=int, default=2_000_000, help="Stop after this many visits")
+    parser.add_argument("--duration", type=float, default=6 * 3600, help="Stop after this many seconds")
+    parser.add_argument("--workers", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--max-depth", type=int, default=64)
+    parser.add_argument("--max-rss-mb", type=int, default=512)
+    parser.add_argument("--max-frontier", type=int, default=1_000_000)
+    parser.add_argument("--max-inflight-mb", type=int, default=32)
+    parser.add_argument("--sample-secs", type=float, default=10.0)
+    parser.add_argument("--warmup", type=float, default=0.2, help="Fraction of samples ignored")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    parser.add_argument("--out", help="Write RSS samples to this JSON file")
+    args = parser.parse_args()
+
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.synthetic_site", "--port", str(port)]
+        + site_argv(SiteConfig.from_args(args))
+    )
+
+    try:
+        wait_for_port(port)
+        with tempfile.TemporaryDirectory(prefix="soak_") as workdir:
+            samples, governor = asyncio.run(
+                soak(args, port, os.path.join(workdir, "soak.db"))
+            )
+    finally:
+        server.terminate()
+        server.wait()
+
+    growth, ok = verdict(samples, args.warmup, args.tolerance)
+    if growth is None:
+        print("[SOAK] Not enough samples for a verdict")
+    else:
+        print(
+            f"[SOAK] steady-state RSS growth {growth:+.1%} "
+            f"(dropped_links={governor.dropped_links}, "
+            f"throttled={governor.throttle_events}) → {'FLAT' if ok else 'GROWING'}"
+        )
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"samples": samples, "growth": growth, "ok": ok}, f, indent=2)
+
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
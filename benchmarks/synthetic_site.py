@@ -0,0 +1,196 @@
+"""
+Deterministic synthetic website served over aiohttp on localhost.
+
+Every property of a page (outgoing links, size, latency, error status,
+trap link) is derived from (seed, page number), so repeated runs serve
+exactly the same site.
+
+Usage:
+    python -m benchmarks.synthetic_site --pages 5000 --port 8765
+"""
+import argparse
+import asyncio
+import hashlib
+import math
+import random
+
+from aiohttp import web
+
+FILLER = (
+    "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do "
+    "eiusmod tempor incididunt ut labore et dolore magna aliqua. "
+)
+
+
+class SiteConfig:
+    def __init__(
+        self,
+        pages=5000,
+        fan_out=10,
+        page_size=20_000,
+        latency="lognormal",
+        latency_ms=20.0,
+        error_rate=0.01,
+        trap_rate=0.005,
+        charset="header",
+        seed=1,
+    ):
+        self.pages = pages
+        self.fan_out = fan_out
+        self.page_size = page_size
+        self.latency = latency            # "none" | "fixed" | "uniform" | "lognormal"
+        self.latency_ms = latency_ms      # mean / fixed value
+        self.error_rate = error_rate
+        self.trap_rate = trap_rate
+        self.charset = charset            # "header" | "meta" | "none"
+        self.seed = seed
+
+    @classmethod
+    def add_arguments(cls, parser):
+        defaults = cls()
+        parser.add_argument("--pages", type=int, default=defaults.pages)
+        parser.add_argument("--fan-out", type=int, default=defaults.fan_out)
+        parser.add_argument("--page-size", type=int, default=defaults.page_size)
+        parser.add_argument(
+            "--latency",
+            choices=["none", "fixed", "uniform", "lognormal"],
+            default=defaults.latency,
+        )
+        parser.add_argument("--latency-ms", type=float, default=defaults.latency_ms)
+        parser.add_argument("--error-rate", type=float, default=defaults.error_rate)
+        parser.add_argument("--trap-rate", type=float, default=defaults.trap_rate)
+        parser.add_argument(
+            "--charset",
+            choices=["header", "meta", "none"],
+            default=defaults.charset,
+            help="Where pages declare their encoding",
+        )
+        parser.add_argument("--seed", type=int, default=defaults.seed)
+
+    @classmethod
+    def from_args(cls, args):
+        return cls(
+            pages=args.pages,
+            fan_out=args.fan_out,
+            page_size=args.page_size,
+            latency=args.latency,
+            latency_ms=args.latency_ms,
+            error_rate=args.error_rate,
+            trap_rate=args.trap_rate,
+            charset=args.charset,
+            seed=args.seed,
+        )
+
+    def as_dict(self):
+        return dict(vars(self))
+
+
+class SyntheticSite:
+    def __init__(self, config):
+        self.config = config
+
+    def _rng(self, *key):
+        digest = hashlib.blake2b(
+            repr((self.config.seed, *key)).encode(), digest_size=8
+        ).digest()
+        return random.Random(int.from_bytes(digest, "big"))
+
+    def _delay(self, rng):
+        cfg = self.config
+        if cfg.latency == "none" or cfg.latency_ms <= 0:
+            return 0.0
+        if cfg.latency == "fixed":
+            ms = cfg.latency_ms
+        elif cfg.latency == "uniform":
+            ms = rng.uniform(0, 2 * cfg.latency_ms)
+        else:
+            # lognormal with the requested mean and a heavy-ish tail
+            sigma = 0.8
+            ms = rng.lognormvariate(0, sigma) * cfg.latency_ms / math.exp(sigma ** 2 / 2)
+        return ms / 1000
+
+    def _render(self, links):
+        anchors = "\n".join(f'<a href="{href}">{href}</a>' for href in links)
+        meta = '<meta charset="utf-8">' if self.config.charset == "meta" else ""
+        body = f"<html><head>{meta}<title>page</title></head><body>\n{anchors}\n"
+        pad = max(0, self.config.page_size - len(body) - 16)
+        filler = (FILLER * (pad // len(FILLER) + 1))[:pad]
+        return body + f"<p>{filler}</p></body></html>"
+
+    def _response(self, html):
+        if self.config.charset == "header":
+            return web.Response(text=html, content_type="text/html")
+        # bare "text/html": the client has to find the encoding itself
+        return web.Response(body=html.encode("utf-8"), content_type="text/html")
+
+    def page_links(self, n, rng):
+        cfg = self.config
+        # n -> n+1 keeps every page reachable from the root
+        links = {f"/page/{(n + 1) % cfg.pages}"}
+        while len(links) < min(cfg.fan_out, cfg.pages):
+            links.add(f"/page/{rng.randrange(cfg.pages)}")
+        if rng.random() < cfg.trap_rate:
+            links.add(f"/calendar/{n}/0")
+        return sorted(links)
+
+    async def handle_page(self, request):
+        n = int(request.match_info["n"])
+        if n >= self.config.pages:
+            raise web.HTTPNotFound()
+
+        rng = self._rng("page", n)
+        await asyncio.sleep(self._delay(rng))
+
+        if rng.random() < self.config.error_rate:
+            raise web.HTTPInternalServerError()
+
+        return self._response(self._render(self.page_links(n, rng)))
+
+    async def handle_calendar(self, request):
+        # infinite "next month" space: every page links one step further
+        base = int(request.match_info["base"])
+        step = int(request.match_info["step"])
+        rng = self._rng("calendar", base, step)
+        await asyncio.sleep(self._delay(rng))
+
+        links = [f"/calendar/{base}/{step + 1}", f"/page/{base % self.config.pages}"]
+        return self._response(self._render(links))
+
+    async def handle_root(self, request):
+        raise web.HTTPFound("/page/0")
+
+    def app(self):
+        app = web.Application()
+        app.router.add_get("/", self.handle_root)
+        app.router.add_get(r"/page/{n:\d+}", self.handle_page)
+        app.router.add_get(r"/calendar/{base:\d+}/{step:\d+}", self.handle_calendar)
+        return app
+
+
+async def serve(config, host="127.0.0.1", port=8765):
+    runner = web.AppRunner(SyntheticSite(config).app(), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    return runner
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic benchmark website")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    SiteConfig.add_arguments(parser)
+    args = parser.parse_args()
+
+    config = SiteConfig.from_args(args)
+    web.run_app(
+        SyntheticSite(config).app(),
+        host=args.host,
+        port=args.port,
+        access_log=None,
+        print=None,
+    )
+
+
+if __name__ == "__main__":
+    main()
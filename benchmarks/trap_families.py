@@ -0,0 +1,76 @@
+"""
+Regression check for the crawl-trap guard: URL families larger than the
+pattern budget, some legitimate (numeric-ID catalogs, which must be kept
+whole) and some traps (which must be capped). A trap may overshoot the
+budget by the URLs it takes to learn its wildcards (wildcard_after per
+position).
+
+Usage:
+    python -m benchmarks.trap_families --count 20000
+"""
+import argparse
+import random
+import string
+import sys
+import uuid
+
+from core.traps import TrapDetector
+
+HOST = "https://bench.local"
+
+
+def catalogs(count):
+    yield "product", (f"{HOST}/product/{i}" for i in range(count))
+    yield "article", (f"{HOST}/2024/05/article-{i}" for i in range(count))
+    yield "search", (f"{HOST}/search?q=term{i}" for i in range(count))
+    yield "slug", (f"{HOST}/shop/shoes/red-sneaker-{i}" for i in range(count))
+
+
+def traps(count):
+    yield "calendar", (
+        f"{HOST}/calendar/{2000 + i // 372}/{i // 31 % 12 + 1}/{i % 31 + 1}"
+        for i in range(count)
+    )
+    yield "facets", (
+        f"{HOST}/list?color=c{i % 7}&size={i % 5}&page={i}" for i in range(count)
+    )
+    rng = random.Random(1)
+    word = lambda: "".join(rng.choices(string.ascii_lowercase, k=8))
+    yield "random_path", (f"{HOST}/tags/{word()}/{word()}" for _ in range(count))
+    yield "session_id", (f"{HOST}/s/{uuid.uuid4()}/index.html" for _ in range(count))
+
+
+def kept(detector, urls):
+    n = 0
+    for url in urls:
+        key = detector.check(url)
+        if key is not None:
+            detector.add(key)
+            n += 1
+    return n
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trap guard vs large URL families")
+    parser.add_argument("--count", type=int, default=20_000)
+    parser.add_argument("--pattern-budget", type=int, default=10_000)
+    args = parser.parse_args()
+
+    failed = False
+    for expect, families in (("all", catalogs), ("capped", traps)):
+        for name, urls in families(args.count):
+            detector = TrapDetector(pattern_budget=args.pattern_budget)
+            n = kept(detector, urls)
+            cap = args.pattern_budget + 2 * (detector.wildcard_after + 1)
+            ok = n == args.count if expect == "all" else n <= cap
+            failed |= not ok
+            print(
+                f"[TRAPS] {name:<12} kept {n:>7}/{args.count}  "
+                f"expected {expect:<6} {'ok' if ok else 'REGRESSION'}"
+            )
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+URL storage benchmark: legacy full-URL TEXT keys vs host dictionary +
+fingerprint with the whole path per row ("host_fp") vs the compact schema,
+which also moves directories into a dictionary and keeps only the leaf.
+
+Reports bytes/URL of the visited table (data + indexes) and point-lookup
+latency for is_visited-style queries.
+
+Usage:
+    python -m benchmarks.url_storage --count 10000000
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from storage.schema import TABLES
+from storage.url_codec import split_path, split_url, url_fingerprint
+
+LEGACY_VISITED = """
+    CREATE TABLE visited (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        url TEXT UNIQUE,
+        depth INTEGER,
+        visited_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        status INTEGER
+    )
+"""
+
+HOST_FP_TABLES = (
+    "CREATE TABLE hosts (id INTEGER PRIMARY KEY, host TEXT UNIQUE)",
+    """
+    CREATE TABLE visited (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        fp INTEGER NOT NULL UNIQUE,
+        host_id INTEGER,
+        path TEXT,
+        depth INTEGER,
+        visited_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        status INTEGER
+    )
+    """,
+)
+
+
+def synthetic_url(i):
+    # single-domain crawl shape: shared prefix, mixed path depth and queries
+    return (
+        f"https://www.example.com/category-{i % 997}/"
+        f"section-{i % 31}/item-{i}.html?page={i % 7}"
+    )
+
+
+def open_db(path):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL;")
+    conn.execute("PRAGMA synchronous=NORMAL;")
+    return conn
+
+
+def db_bytes(conn):
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE);")
+    pages = conn.execute("PRAGMA page_count").fetchone()[0]
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    return pages * page_size
+
+
+def load_legacy(conn, count, batch):
+    conn.execute(LEGACY_VISITED)
+    for start in range(0, count, batch):
+        conn.executemany(
+            "INSERT OR IGNORE INTO visited(url, depth) VALUES (?, ?)",
+            ((synthetic_url(i), 3) for i in range(start, min(start + batch, count))),
+        )
+        conn.commit()
+
+
+def _dictionary_id(conn, cache, table, column, value):
+    key = cache.get(value)
+    if key is None:
+        conn.execute(f"INSERT OR IGNORE INTO {table}({column}) VALUES (?)", (value,))
+        key = conn.execute(
+            f"SELECT id FROM {table} WHERE {column} = ?", (value,)
+        ).fetchone()[0]
+        cache[value] = key
+    return key
+
+
+def load_host_fp(conn, count, batch):
+    for stmt in HOST_FP_TABLES:
+        conn.execute(stmt)
+
+    host_ids = {}
+
+    def rows(start, stop):
+        for i in range(start, stop):
+            url = synthetic_url(i)
+            host, path = split_url(url)
+            host_id = _dictionary_id(conn, host_ids, "hosts", "host", host)
+            yield url_fingerprint(url), host_id, path, 3
+
+    for start in range(0, count, batch):
+        conn.executemany(
+            "INSERT OR IGNORE INTO visited(fp, host_id, path, depth) VALUES (?, ?, ?, ?)",
+            rows(start, min(start + batch, count)),
+        )
+        conn.commit()
+
+
+def load_compact(conn, count, batch):
+    for stmt in TABLES:
+        conn.execute(stmt)
+
+    host_ids = {}
+    dir_ids = {}
+
+    def rows(start, stop):
+        for i in range(start, stop):
+            url = synthetic_url(i)
+            host, path = split_url(url)
+            directory, leaf = split_path(path)
+            host_id = _dictionary_id(conn, host_ids, "hosts", "host", host)
+            dir_id = _dictionary_id(conn, dir_ids, "dirs", "dir", directory)
+            yield url_fingerprint(url), host_id, dir_id, leaf, 3
+
+    for start in range(0, count, batch):
+        conn.executemany(
+            """
+            INSERT OR IGNORE INTO visited(fp, host_id, dir_id, leaf, depth)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            rows(start, min(start + batch, count)),
+        )
+        conn.commit()
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def time_lookups(conn, urls, compact):
+    samples = []
+    for url in urls:
+        start = time.perf_counter()
+        if compact:
+            conn.execute(
+                "SELECT 1 FROM visited WHERE fp = ? LIMIT 1", (url_fingerprint(url),)
+            ).fetchone()
+        else:
+            conn.execute(
+                "SELECT 1 FROM visited WHERE url = ? LIMIT 1", (url,)
+            ).fetchone()
+        samples.append(time.perf_counter() - start)
+
+    return {
+        "p50_us": round(percentile(samples, 50) * 1e6, 2),
+        "p99_us": round(percentile(samples, 99) * 1e6, 2),
+    }
+
+
+def run(count, lookups, batch, workdir, seed=42):
+    rng = random.Random(seed)
+    # half hits, half misses
+    probe = [synthetic_url(rng.randrange(count)) for _ in range(lookups // 2)]
+    probe += [synthetic_url(count + rng.randrange(count)) for _ in range(lookups - len(probe))]
+    rng.shuffle(probe)
+
+    results = {"count": count, "lookups": lookups}
+
+    for name, loader, compact in (
+        ("legacy", load_legacy, False),
+        ("host_fp", load_host_fp, True),
+        ("compact", load_compact, True),
+    ):
+        path = os.path.join(workdir, f"{name}.db")
+        conn = open_db(path)
+
+        start = time.perf_counter()
+        loader(conn, count, batch)
+        load_secs = time.perf_counter() - start
+
+        size = db_bytes(conn)
+        latency = time_lookups(conn, probe, compact)
+        conn.close()
+
+        results[name] = {
+            "bytes_per_url": round(size / count, 1),
+            "db_bytes": size,
+            "load_secs": round(load_secs, 1),
+            **latency,
+        }
+        print(
+            f"[BENCH] {name:<8} bytes/url={results[name]['bytes_per_url']:<7} "
+            f"lookup p50={latency['p50_us']}µs p99={latency['p99_us']}µs "
+            f"load={load_secs:.1f}s"
+        )
+
+    for name in ("host_fp", "compact"):
+        ratio = results["legacy"]["bytes_per_url"] / results[name]["bytes_per_url"]
+        print(f"[BENCH] {name} schema is {ratio:.2f}x smaller than legacy")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="URL storage benchmark")
+    parser.add_argument("--count", type=int, default=10_000_000)
+    parser.add_argument("--lookups", type=int, default=100_000)
+    parser.add_argument("--batch", type=int, default=50_000)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="url_bench_") as workdir:
+        results = run(args.count, args.lookups, args.batch, workdir)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
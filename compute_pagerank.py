@@ -0,0 +1,30 @@
+import argparse
+from utils.pagerank import PageRankJob
+from config import DB_PATH
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compute in-degree and PageRank from the recorded link graph"
+    )
+    parser.add_argument("--damping", type=float, default=0.85)
+    parser.add_argument("--tol", type=float, default=1e-6)
+    parser.add_argument("--max-iter", type=int, default=100)
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Recompute even if no edges were added since the last run",
+    )
+    args = parser.parse_args()
+
+    job = PageRankJob(
+        DB_PATH,
+        damping=args.damping,
+        tol=args.tol,
+        max_iter=args.max_iter,
+    )
+    job.run(force=args.force)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,3 +7,15 @@ DB_PATH = "crawler.db"
 DELAY = 2
 AUTO_COMMIT_SECONDS = 300
 USER_AGENT = "SQLiteCrawler/1.0"
+
+# Resource budgets (None = unlimited)
+MAX_RSS_MB = 1024
+MAX_FRONTIER = 5_000_000
+MAX_INFLIGHT_MB = 64
+FETCH_RESERVE_KB = 512      # reserved per download before its size is known
+
+# Crawl-trap guard (per URL template / directory, see core/traps.py)
+TRAP_PATTERN_BUDGET = 10_000
+TRAP_DIRECTORY_BUDGET = 50_000
+MAX_URL_LENGTH = 2048
+MAX_SEGMENT_REPEATS = 3
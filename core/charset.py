@@ -0,0 +1,86 @@
+import codecs
+import re
+
+PRESCAN_BYTES = 4096
+
+# <meta charset="x">, <meta http-equiv=... content="...; charset=x">, <?xml encoding="x"?>
+_META_CHARSET = re.compile(
+    rb"""<meta[^>]+charset\s*=\s*["']?\s*([A-Za-z0-9_:.+-]+)"""
+    rb"""|<\?xml[^>]+encoding\s*=\s*["']([A-Za-z0-9_:.+-]+)""",
+    re.IGNORECASE,
+)
+
+_CONTENT_TYPE_CHARSET = re.compile(r"charset\s*=\s*[\"']?([^\s;\"']+)", re.IGNORECASE)
+
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+
+def normalize(name):
+    """
+    Canonical codec name, or None if Python does not know the encoding.
+    """
+    if not name:
+        return None
+    if isinstance(name, bytes):
+        name = name.decode("ascii", "ignore")
+    try:
+        return codecs.lookup(name.strip()).name
+    except LookupError:
+        return None
+
+
+def charset_from_content_type(content_type):
+    if not content_type:
+        return None
+    match = _CONTENT_TYPE_CHARSET.search(content_type)
+    return normalize(match.group(1)) if match else None
+
+
+class CharsetResolver:
+    """
+    Picks the encoding for a response body without decoding it.
+
+    Order: BOM, HTTP header charset, <meta>/<?xml?> prescan of the first
+    few KB, then the encoding last seen on the same host. Only when all
+    of those miss is the body test-decoded (UTF-8, else windows-1252, the
+    HTML default) - no statistical detection over the whole body.
+    """
+
+    CACHE_SIZE = 50_000
+
+    def __init__(self, prescan_bytes=PRESCAN_BYTES):
+        self.prescan_bytes = prescan_bytes
+        self._host_cache = {}
+
+    def resolve(self, body, declared, host=None):
+        for bom, name in _BOMS:
+            if body.startswith(bom):
+                return name
+
+        encoding = normalize(declared)
+
+        if encoding is None:
+            match = _META_CHARSET.search(body, 0, self.prescan_bytes)
+            if match:
+                encoding = normalize(match.group(1) or match.group(2))
+
+        if encoding is None and host is not None:
+            encoding = self._host_cache.get(host)
+
+        if encoding is None:
+            try:
+                body.decode("utf-8")
+                encoding = "utf-8"
+            except UnicodeDecodeError:
+                encoding = "cp1252"
+
+        if host is not None:
+            if len(self._host_cache) >= self.CACHE_SIZE:
+                self._host_cache.clear()
+            self._host_cache[host] = encoding
+
+        return encoding
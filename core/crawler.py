@@ -1,4 +1,8 @@
 import time
+
+from utils.metrics import StageTimer
+
+
 class Crawler:
     def __init__(
         self,
@@ -9,6 +13,7 @@ class Crawler:
         auto_commit,
         policy=None,
         metrics=None,
+        traps=None,
     ):
         self.store = store
         self.fetcher = fetcher
@@ -17,16 +22,22 @@ class Crawler:
         self.auto_commit = auto_commit
         self.policy = policy
         self.metrics = metrics
+        self.traps = traps
         self.last_commit = time.time()
         self.processed = 0
+        self.stages = StageTimer()
 
     def run(self, start_url):
         self.store.enqueue(start_url, depth=0)
 
         while True:
+            t0 = time.perf_counter()
             item = self.store.dequeue()
+            self.stages.observe("dequeue", time.perf_counter() - t0)
             if not item:
                 print("✅ Queue empty. Crawl complete.")
+                if self.traps:
+                    self.traps.report()
                 break
 
             url, depth = item
@@ -41,9 +52,15 @@ class Crawler:
 
 
             try:
-                html = self.fetcher.fetch(url)
-                links = self.parser.extract_links(html, url)
+                t0 = time.perf_counter()
+                body, encoding = self.fetcher.fetch(url)
+                self.stages.observe("fetch", time.perf_counter() - t0)
 
+                t0 = time.perf_counter()
+                links = self.parser.extract_links(body, url, encoding=encoding)
+                self.stages.observe("parse", time.perf_counter() - t0)
+
+                t0 = time.perf_counter()
                 for link in links:
                     next_depth = depth + 1
 
@@ -51,7 +68,13 @@ class Crawler:
                         if not self.policy.allowed(link, next_depth):
                             continue
 
-                    self.store.enqueue(link, next_depth)
+                    trap_key = self.traps.check(link) if self.traps else None
+                    if self.traps and trap_key is None:
+                        continue
+
+                    if self.store.enqueue(link, next_depth) and self.traps:
+                        self.traps.add(trap_key)
+                self.stages.observe("enqueue", time.perf_counter() - t0)
 
                 print(f"[{self.processed}] depth={depth} {url}")
 
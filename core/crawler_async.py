@@ -1,4 +1,9 @@
+import time
 import asyncio
+from collections import deque
+
+from storage.url_codec import canonical_url
+from utils.metrics import StageTimer
 
 
 class AsyncCrawler:
@@ -9,39 +14,71 @@ class AsyncCrawler:
         parser,
         policy,
         metrics,
-        worker_count=25,
+        worker_count=None,
+        governor=None,
+        worker_slack=2,
+        traps=None,
+        pipeline=None,
     ):
         self.store = store
         self.fetcher = fetcher        # fetcher owns concurrency controller
         self.parser = parser
         self.policy = policy
         self.metrics = metrics
-        self.worker_count = worker_count
+        self.worker_count = worker_count  # upper bound on pool size (None = no cap)
+        self.worker_slack = worker_slack  # workers beyond the fetch limit (DB/parse time)
+        self.governor = governor      # optional ResourceGovernor
+        self.traps = traps            # optional TrapDetector
+        self.pipeline = pipeline      # optional ProcessorPipeline
 
-        self.workers = []
+        self.stages = StageTimer()
+        self.workers = set()
         self.metrics_task = None
+        self.governor_task = None
         self._stopping = False
 
-    async def run(self, start_url):
+        # elastic pool state
+        self._next_wid = 0
+        self._retire = 0              # workers asked to exit after their current URL
+        self._busy = 0                # workers currently processing a URL
+        self._idle = deque()          # futures of workers waiting for work
+        self._finished = asyncio.Event()
+        self._worker_error = None
+
+    async def run(self, start_urls):
+        """
+        start_urls: a single URL or an iterable of seed URLs.
+        """
+        if isinstance(start_urls, str):
+            start_urls = [start_urls]
+
         await self.store.connect()
-        await self.store.enqueue(start_url, depth=0)
+        for url in start_urls:
+            await self.store.enqueue(url, depth=0)
 
         async with self.fetcher:
             # start metrics reporter ONCE
             self.metrics_task = asyncio.create_task(self.metrics_reporter())
 
-            # start workers
-            self.workers = [
-                asyncio.create_task(self.worker(i))
-                for i in range(self.worker_count)
-            ]
+            if self.governor:
+                self.governor_task = asyncio.create_task(self.governor_loop())
+
+            # start workers (pool follows the concurrency controller)
+            self._resize_pool()
 
             try:
-                await asyncio.gather(*self.workers)
+                await self._finished.wait()
             except asyncio.CancelledError:
                 await self.shutdown()
                 raise
 
+            if self._worker_error:
+                await self.shutdown()
+                raise self._worker_error
+
+            print("✅ Queue empty. Crawl complete.")
+            await self.shutdown()
+
     async def shutdown(self):
         if self._stopping:
             return
@@ -50,19 +87,24 @@ class AsyncCrawler:
         print("\n🛑 Async shutdown initiated...")
 
         # stop workers
-        for task in self.workers:
+        workers = list(self.workers)
+        for task in workers:
             task.cancel()
 
-        # stop metrics reporter
-        if self.metrics_task:
-            self.metrics_task.cancel()
-
-        await asyncio.gather(*self.workers, return_exceptions=True)
+        # stop metrics reporter and governor
+        background = [t for t in (self.metrics_task, self.governor_task) if t]
+        for task in background:
+            task.cancel()
 
-        if self.metrics_task:
-            await asyncio.gather(self.metrics_task, return_exceptions=True)
+        await asyncio.gather(*workers, return_exceptions=True)
+        await asyncio.gather(*background, return_exceptions=True)
 
         await self.store.close()
+        if self.traps:
+            self.traps.report()
+        if self.pipeline and self.pipeline.failures:
+            failed = " ".join(f"{n}={c}" for n, c in self.pipeline.failures.items())
+            print(f"[PROCESS] Processor failures: {failed}")
         print("✅ Async crawler exited safely")
 
     # -------------------------------------------------
@@ -74,65 +116,291 @@ class AsyncCrawler:
                 await asyncio.sleep(self.metrics.interval)
 
                 visited, errors = await self.metrics.snapshot()
-                qsize = await self.store.queue_size()
+                qsize = self.store.queue_len
                 uptime = self.metrics.uptime()
                 rate = visited / uptime if uptime > 0 else 0
 
                 print(
                     f"[METRICS] visited={visited} | queue={qsize} | "
-                    f"errors={errors} | rate={rate:.2f} urls/sec | uptime={uptime}s"
+                    f"errors={errors} | rate={rate:.2f} urls/sec | uptime={uptime}s | "
+                    f"workers={len(self.workers) - self._retire} busy={self._busy}"
                 )
+
+                if self.governor:
+                    free = self.governor.headroom()
+                    print(
+                        "[METRICS] headroom "
+                        + " | ".join(
+                            f"{k}={v:.0%}" for k, v in free.items() if v is not None
+                        )
+                        + f" | dropped_links={self.governor.dropped_links}"
+                        f" | throttled={self.governor.throttle_events}"
+                    )
+
+                if self.traps:
+                    print(f"[METRICS] trap_pruned={self.traps.total_pruned()}")
+
+                hotspots = await self.store.error_hotspots()
+                if hotspots:
+                    print(
+                        "[METRICS] error hotspots (5 min) "
+                        + " | ".join(
+                            f"{host} {status or 'no-response'}×{n} ({rtt:.0f}ms)"
+                            for host, status, n, rtt in hotspots
+                        )
+                    )
         except asyncio.CancelledError:
             pass
 
     # -------------------------------------------------
-    # WORKERS
+    # RESOURCE GOVERNOR
     # -------------------------------------------------
-    async def worker(self, wid):
+    async def governor_loop(self):
+        over_before = False
         try:
             while not self._stopping:
-                item = await self.store.dequeue()
-                if not item:
-                    await asyncio.sleep(0.5)
-                    continue
+                await asyncio.sleep(self.governor.interval)
 
-                url, depth = item
+                over = self.governor.update(self.store.queue_len)
+                # keeps the outcome rollup current without a flush per fetch
+                await self.store.flush_outcomes()
+                if over:
+                    await self.store.release_memory()
+                if over != over_before:
+                    state = "throttling workers" if over else "resumed"
+                    print(f"[GOVERNOR] RSS budget → {state}")
+                    over_before = over
+        except asyncio.CancelledError:
+            pass
 
-                if await self.store.is_visited(url):
-                    continue
+    # -------------------------------------------------
+    # WORKER POOL
+    # -------------------------------------------------
+    def _target_workers(self):
+        target = self.fetcher.ctrl.current + self.worker_slack
+        if self.worker_count:
+            target = min(target, self.worker_count)
+        return max(1, target)
 
-                await self.store.mark_visited(url, depth)
-                await self.metrics.inc_visited()
+    def _spawn_worker(self):
+        wid = self._next_wid
+        self._next_wid += 1
+        task = asyncio.create_task(self.worker(wid))
+        self.workers.add(task)
+        task.add_done_callback(self._worker_done)
 
-                # ---- ASYNC FETCH ----
-                html, rtt, success, content_type = await self.fetcher.fetch(url)
+    def _worker_done(self, task):
+        self.workers.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            # surface unexpected worker failures from run()
+            self._worker_error = task.exception()
+            self._finished.set()
 
-                # ---- DYNAMIC CONCURRENCY FEEDBACK ----
-                self.fetcher.ctrl.record(success, rtt)
+    def _resize_pool(self):
+        if self._stopping or self._finished.is_set():
+            return
 
-                if self.fetcher.ctrl.should_adjust():
-                    new_c = self.fetcher.ctrl.adjust()
-                    self.fetcher._resize_semaphore(new_c)
-                    print(f"[TUNER] Adjusted concurrency → {new_c}")
-                # ------------------------------------
+        target = self._target_workers()
+        live = len(self.workers) - self._retire
 
-                if not html:
-                    await self.metrics.inc_error()
-                    await self.store.log_error(
-                        url,
-                        error_type="fetch_failed",
-                        message="HTTP error / timeout / non-200",
-                    )
+        if target > live:
+            # cancel pending retirements before spawning new workers
+            revived = min(self._retire, target - live)
+            self._retire -= revived
+            for _ in range(target - live - revived):
+                self._spawn_worker()
+        elif target < live:
+            self._retire += live - target
+            # idle workers must wake up to notice they are retired
+            self._wake(live - target)
+
+    def _wake(self, n=None):
+        """
+        Wake up to n idle workers (all if n is None), oldest first.
+        """
+        while self._idle and (n is None or n > 0):
+            fut = self._idle.popleft()
+            if not fut.done():
+                fut.set_result(None)
+                if n is not None:
+                    n -= 1
+
+    async def _wait_for_work(self):
+        fut = asyncio.get_running_loop().create_future()
+        self._idle.append(fut)
+        await fut
+
+    # -------------------------------------------------
+    # WORKERS
+    # -------------------------------------------------
+    async def worker(self, wid):
+        try:
+            while not self._stopping and not self._finished.is_set():
+                if self._retire > 0:
+                    self._retire -= 1
+                    return
+
+                if self.governor:
+                    await self.governor.acquire_slot()
+                self._busy += 1
+                try:
+                    processed = await self.process_next()
+                finally:
+                    self._busy -= 1
+                    if self.governor:
+                        self.governor.release_slot()
+
+                if processed:
                     continue
 
-                links = self.parser.extract_links(html, url, content_type)
+                # ---- frontier empty: wait for new links, never poll ----
+                if self.store.queue_len > 0:
+                    continue
+                if self._busy == 0:
+                    # nobody can add more work: crawl is complete
+                    self._finished.set()
+                    self._wake()
+                    return
 
-                for link in links:
-                    next_depth = depth + 1
-                    if self.policy and not self.policy.allowed(link, next_depth):
-                        continue
-                    await self.store.enqueue(link, next_depth)
+                # no await between the checks above and parking: no lost wakeups
+                await self._wait_for_work()
 
         except asyncio.CancelledError:
             # normal shutdown path
             pass
+
+    async def process_next(self):
+        """
+        Crawl one URL from the queue. Returns False if the queue was empty.
+        """
+        t0 = time.perf_counter()
+        item = await self.store.dequeue()
+        self.stages.observe("dequeue", time.perf_counter() - t0)
+        if not item:
+            return False
+
+        url, depth = item
+        await self._process(url, depth)
+
+        # not reached on cancellation: a distributed backend re-queues the URL
+        await self.store.ack(url)
+        return True
+
+    async def _process(self, url, depth):
+        if await self.store.is_visited(url):
+            return
+
+        await self.store.mark_visited(url, depth)
+        await self.metrics.inc_visited()
+
+        # in-flight bytes are reserved before the download, whose size is
+        # not known yet, and trued up once the body is in memory
+        reserved = self.governor.fetch_reserve if self.governor else 0
+        if reserved:
+            self.governor.reserve(reserved)
+
+        try:
+            # ---- ASYNC FETCH ----
+            t0 = time.perf_counter()
+            body, rtt, success, content_type, status, encoding, error = await self.fetcher.fetch(url)
+            self.stages.observe("fetch", time.perf_counter() - t0)
+            await self.store.set_status(url, status)
+            await self.store.record_outcome(url, status, rtt, error)
+
+            # ---- DYNAMIC CONCURRENCY FEEDBACK ----
+            self.fetcher.ctrl.record(success, rtt)
+
+            if self.fetcher.ctrl.should_adjust():
+                new_c = self.fetcher.ctrl.adjust()
+                self.fetcher._resize_semaphore(new_c)
+                self._resize_pool()
+                print(f"[TUNER] Adjusted concurrency → {new_c}")
+            # ------------------------------------
+
+            if not body:
+                await self.metrics.inc_error()
+                return
+
+            # body stays in memory until its links are enqueued
+            if self.governor:
+                self.governor.reserve(len(body) - reserved)
+                reserved = len(body)
+
+            await self._handle_page(url, depth, body, content_type, encoding)
+        finally:
+            if reserved:
+                self.governor.release(reserved)
+
+    async def _handle_page(self, url, depth, body, content_type, encoding):
+        t0 = time.perf_counter()
+        page = self.parser.parse(body, url, content_type, encoding)
+        self.stages.observe("parse", time.perf_counter() - t0)
+
+        # ---- rel=canonical: a variant is indexed as its canonical ----
+        duplicate = await self._is_duplicate(url, page)
+        if duplicate:
+            self._wake(await self._enqueue_links([page.canonical], depth))
+
+        # ---- processors share the parse above ----
+        if self.pipeline and not page.noindex and not duplicate:
+            t0 = time.perf_counter()
+            record = self.pipeline.run(page)
+            self.stages.observe("process", time.perf_counter() - t0)
+            if record:
+                await self.store.add_page_data(url, record)
+
+        links = set() if page.nofollow else page.links
+
+        # full in-scope link graph, before crawl policies prune it
+        await self.store.add_edges(url, links)
+
+        t0 = time.perf_counter()
+        added = await self._enqueue_links(links, depth + 1)
+        self.stages.observe("enqueue", time.perf_counter() - t0)
+
+        # one idle worker per new URL
+        self._wake(added)
+
+    async def _is_duplicate(self, url, page):
+        """
+        True if the page names a different, in-scope canonical URL that
+        has not been crawled yet (a visited canonical means a loop, so
+        the page is treated as its own).
+        """
+        if not page.canonical:
+            return False
+        if canonical_url(page.canonical) == canonical_url(url):
+            return False
+        if not self.parser.in_scope(page.canonical):
+            return False
+        return not await self.store.is_visited(page.canonical)
+
+    async def _enqueue_links(self, links, depth):
+        """
+        Filter links (policy, traps, governor) and enqueue the rest at
+        `depth`. Returns how many were new.
+        """
+        candidates, trap_keys = [], []
+        for link in links:
+            if self.policy and not self.policy.allowed(link, depth):
+                continue
+            trap_key = self.traps.check(link) if self.traps else None
+            if self.traps and trap_key is None:
+                continue
+            if self.governor and not self.governor.allow_link(depth):
+                continue
+            candidates.append((link, depth))
+            trap_keys.append(trap_key)
+
+        # one round trip per page for remote frontiers
+        added = 0
+        flags = await self.store.enqueue_many(candidates)
+        for was_added, trap_key in zip(flags, trap_keys):
+            if not was_added:
+                continue
+            added += 1
+            if self.traps:
+                self.traps.add(trap_key)
+            if self.governor:
+                self.governor.note_enqueued()
+        return added
@@ -1,11 +1,25 @@
+from urllib.parse import urlparse
+
 import requests
 
+from core.charset import CharsetResolver, charset_from_content_type
+
 class Fetcher:
     def __init__(self, user_agent):
         self.session = requests.Session()
         self.session.headers.update({"User-Agent": user_agent})
+        self.charsets = CharsetResolver()
 
     def fetch(self, url, timeout=10):
+        """
+        Returns (body bytes, encoding). response.text is avoided because
+        it runs charset detection over the whole body.
+        """
         response = self.session.get(url, timeout=timeout)
         response.raise_for_status()
-        return response.text
+        encoding = self.charsets.resolve(
+            response.content,
+            charset_from_content_type(response.headers.get("Content-Type")),
+            urlparse(url).netloc,
+        )
+        return response.content, encoding
@@ -1,21 +1,26 @@
-import aiohttp
 import asyncio
 import time
+from urllib.parse import urlparse
+
+from core.charset import CharsetResolver
+from core.transport import HTTPTransport
 
 
 class AsyncFetcher:
-    def __init__(self, user_agent, concurrency_controller):
+    def __init__(self, user_agent, concurrency_controller, transport=None):
         self.ctrl = concurrency_controller
         self.semaphore = asyncio.Semaphore(self.ctrl.current)
         self.headers = {"User-Agent": user_agent}
-        self.session = None
+        # live network unless a recording / replay transport is given
+        self.transport = transport or HTTPTransport(self.headers)
+        self.charsets = CharsetResolver()
 
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession(headers=self.headers)
+        await self.transport.open()
         return self
 
     async def __aexit__(self, exc_type, exc, tb):
-        await self.session.close()
+        await self.transport.close()
 
     def _resize_semaphore(self, new_limit):
         diff = new_limit - self.semaphore._value
@@ -26,20 +31,24 @@ class AsyncFetcher:
         # shrink happens naturally as permits are acquired
 
     async def fetch(self, url, timeout=10):
+        """
+        Returns (body, rtt, success, content_type, status, encoding, error).
+        The body is left as raw bytes; the parser decodes it once. error is
+        the exception raised when no response arrived.
+        """
         async with self.semaphore:
             start = time.time()
             try:
-                async with self.session.get(url, timeout=timeout) as resp:
-                    text = await resp.text()
-                    rtt = time.time() - start
-                    success = resp.status == 200
-                    content_type = resp.headers.get("Content-Type", "")
-                    return (
-                        text if success else None,
-                        rtt,
-                        success,
-                        content_type,
-                    )
-            except Exception:
+                result = await self.transport.get(url, timeout=timeout)
+                rtt = time.time() - start
+                success = result.status == 200
+                content_type = result.headers.get("content-type", "")
+                if not success:
+                    return None, rtt, False, content_type, result.status, None, None
+                encoding = self.charsets.resolve(
+                    result.body, result.encoding, urlparse(url).netloc
+                )
+                return result.body, rtt, True, content_type, result.status, encoding, None
+            except Exception as e:
                 rtt = time.time() - start
-                return None, rtt, False, None
+                return None, rtt, False, None, None, None, e
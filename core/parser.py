@@ -1,14 +1,55 @@
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
 
+from core.policies import HostScope
+
+
+class Page:
+    """
+    One parsed document: the soup plus what the crawler itself needs
+    from it. Processors (core/processors.py) read the same soup.
+    """
+
+    __slots__ = ("url", "soup", "links", "canonical", "robots")
+
+    def __init__(self, url, soup, links, canonical=None, robots=frozenset()):
+        self.url = url
+        self.soup = soup
+        self.links = links              # in-scope absolute URLs
+        self.canonical = canonical      # absolute <link rel=canonical> href
+        self.robots = robots            # lowercase <meta name=robots> directives
+
+    @property
+    def noindex(self):
+        return "noindex" in self.robots or "none" in self.robots
+
+    @property
+    def nofollow(self):
+        return "nofollow" in self.robots or "none" in self.robots
+
+
 class Parser:
-    def __init__(self, domain):
+    def __init__(self, domain=None, scope=None):
+        """
+        Links are kept if their host is `domain` or, for multi-site
+        crawls, matches the HostScope `scope`.
+        """
         self.domain = domain
+        self.scope = scope or HostScope([domain] if domain else [])
 
-    def extract_links(self, content, base_url, content_type=None):
+    def in_scope(self, url):
+        return self.scope.allowed(urlparse(url).netloc)
+
+    def parse(self, content, base_url, content_type=None, encoding=None):
         """
-        Extract links from HTML or XML safely.
+        Parse HTML or XML once and return a Page.
+
+        Raw bytes are decoded exactly once with `encoding` so BeautifulSoup
+        does not run its own charset detection.
         """
+        if isinstance(content, bytes):
+            content = content.decode(encoding or "utf-8", errors="replace")
+
         if content_type and "xml" in content_type.lower():
             soup = BeautifulSoup(content, "xml")
         else:
@@ -18,7 +59,27 @@ class Parser:
 
         for a in soup.find_all("a", href=True):
             full_url = urljoin(base_url, a["href"]).split("#")[0]
-            if urlparse(full_url).netloc == self.domain:
+            if self.in_scope(full_url):
                 links.add(full_url)
 
-        return links
+        canonical = None
+        for link in soup.find_all("link", rel=True, href=True):
+            # rel is a list with the HTML builder, a plain string with XML
+            rel = link["rel"]
+            rels = rel.split() if isinstance(rel, str) else rel
+            if "canonical" in [r.lower() for r in rels]:
+                canonical = urljoin(base_url, link["href"].strip()).split("#")[0]
+                break
+
+        robots = set()
+        for meta in soup.find_all("meta", attrs={"name": True, "content": True}):
+            if meta["name"].strip().lower() == "robots":
+                robots.update(d.strip().lower() for d in meta["content"].split(","))
+
+        return Page(base_url, soup, links, canonical, frozenset(robots))
+
+    def extract_links(self, content, base_url, content_type=None, encoding=None):
+        """
+        Extract links from HTML or XML safely.
+        """
+        return self.parse(content, base_url, content_type, encoding).links
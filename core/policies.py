@@ -27,3 +27,69 @@ class CrawlPolicy:
             return any(path.startswith(p) for p in self.allow_path_prefixes)
 
         return True
+
+
+class HostScope:
+    """
+    Set of hosts the crawler may follow links into.
+
+    Rules:
+        example.com       exact host
+        .example.com      example.com and any subdomain
+        *.example.com     subdomains only
+
+    Lookups walk the host's labels (a handful of set probes) and are cached
+    per netloc, so checking a link is O(1) regardless of rule count.
+    """
+
+    CACHE_SIZE = 100_000
+
+    def __init__(self, rules=()):
+        self.exact = set()
+        self.suffixes = set()
+        self.wildcards = set()
+        self._cache = {}
+
+        for rule in rules:
+            self.add(rule)
+
+    def add(self, rule):
+        rule = rule.strip().lower()
+        if not rule:
+            return
+        if rule.startswith("*."):
+            self.wildcards.add(rule[2:])
+        elif rule.startswith("."):
+            self.suffixes.add(rule[1:])
+        else:
+            self.exact.add(rule)
+        self._cache.clear()
+
+    def __len__(self):
+        return len(self.exact) + len(self.suffixes) + len(self.wildcards)
+
+    def _match(self, host):
+        if host in self.exact or host in self.suffixes:
+            return True
+
+        # parents of a.b.example.com: b.example.com, example.com, com
+        dot = host.find(".")
+        while dot != -1:
+            parent = host[dot + 1:]
+            if parent in self.suffixes or parent in self.wildcards:
+                return True
+            dot = host.find(".", dot + 1)
+        return False
+
+    def allowed(self, netloc):
+        result = self._cache.get(netloc)
+        if result is None:
+            host = netloc.lower()
+            result = self._match(host)
+            if not result and ":" in host:
+                # rules without a port match any port
+                result = self._match(host.rsplit(":", 1)[0])
+            if len(self._cache) >= self.CACHE_SIZE:
+                self._cache.clear()
+            self._cache[netloc] = result
+        return result
@@ -0,0 +1,96 @@
+import json
+from collections import Counter
+from urllib.parse import urljoin
+
+
+# -------------------------------------------------
+# BUILT-IN PROCESSORS: page -> JSON-serialisable value (None = nothing)
+# -------------------------------------------------
+
+def title(page):
+    tag = page.soup.find("title")
+    text = tag.get_text(strip=True) if tag else ""
+    return text or None
+
+
+def meta_description(page):
+    tag = page.soup.find("meta", attrs={"name": "description", "content": True})
+    if tag is None:
+        return None
+    return tag["content"].strip() or None
+
+
+def canonical(page):
+    return page.canonical
+
+
+def meta_robots(page):
+    return sorted(page.robots) or None
+
+
+def hreflang(page):
+    alternates = {}
+    for link in page.soup.find_all("link", hreflang=True, href=True):
+        alternates[link["hreflang"].strip().lower()] = urljoin(page.url, link["href"].strip())
+    return alternates or None
+
+
+def structured_data(page):
+    """
+    JSON-LD blocks; malformed ones are skipped.
+    """
+    items = []
+    for script in page.soup.find_all("script", type="application/ld+json"):
+        try:
+            items.append(json.loads(script.string or ""))
+        except ValueError:
+            continue
+    return items or None
+
+
+BUILTIN_PROCESSORS = {
+    "title": title,
+    "meta_description": meta_description,
+    "canonical": canonical,
+    "meta_robots": meta_robots,
+    "hreflang": hreflang,
+    "structured_data": structured_data,
+}
+
+
+class ProcessorPipeline:
+    """
+    Named callables run on the crawler's single parse of each page.
+
+    Each processor gets the core.parser.Page (url, soup, links,
+    canonical, robots) and returns a JSON-serialisable value. A failing
+    processor is counted and skipped; it never fails the page.
+    """
+
+    def __init__(self, names=()):
+        self.processors = {}
+        self.failures = Counter()
+        for name in names:
+            self.register(name, BUILTIN_PROCESSORS[name])
+
+    def register(self, name, fn):
+        self.processors[name] = fn
+        return fn
+
+    def __len__(self):
+        return len(self.processors)
+
+    def run(self, page):
+        """
+        Returns {name: value} for processors that produced something.
+        """
+        record = {}
+        for name, fn in self.processors.items():
+            try:
+                value = fn(page)
+            except Exception:
+                self.failures[name] += 1
+                continue
+            if value is not None:
+                record[name] = value
+        return record
@@ -0,0 +1,180 @@
+import json
+import zlib
+
+import aiohttp
+import aiosqlite
+
+from storage.url_codec import canonical_url
+
+
+class FetchResult:
+    """
+    What a transport hands back to AsyncFetcher.
+    """
+
+    __slots__ = ("status", "headers", "body", "encoding")
+
+    def __init__(self, status, headers, body, encoding=None):
+        self.status = status
+        self.headers = headers          # plain dict, lowercase keys
+        self.body = body                # raw bytes
+        self.encoding = encoding        # charset declared by the server, if any
+
+
+class HTTPTransport:
+    """
+    Live network transport backed by one aiohttp session.
+    """
+
+    def __init__(self, headers=None):
+        self.headers = headers or {}
+        self.session = None
+
+    async def open(self):
+        self.session = aiohttp.ClientSession(headers=self.headers)
+
+    async def close(self):
+        await self.session.close()
+
+    async def get(self, url, timeout=10):
+        async with self.session.get(url, timeout=timeout) as resp:
+            body = await resp.read()
+            # resp.charset only parses Content-Type; get_encoding() would
+            # fall back to sniffing the whole body
+            return FetchResult(
+                resp.status,
+                {k.lower(): v for k, v in resp.headers.items()},
+                body,
+                resp.charset,
+            )
+
+
+class ResponseCache:
+    """
+    On-disk response cache (SQLite, zlib-compressed bodies) keyed by
+    canonical URL. A NULL status records a network failure so replays
+    reproduce it.
+    """
+
+    def __init__(self, path, batch_size=200):
+        self.path = path
+        self.batch_size = batch_size
+        self.pending = 0
+        self.conn = None
+
+    async def connect(self):
+        self.conn = await aiosqlite.connect(self.path)
+        await self.conn.execute("PRAGMA journal_mode=WAL;")
+        await self.conn.execute("PRAGMA synchronous=NORMAL;")
+        await self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                status INTEGER,
+                headers TEXT,
+                encoding TEXT,
+                body BLOB,
+                fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        await self.conn.commit()
+
+    async def put(self, url, result):
+        if result is None:
+            row = (canonical_url(url), None, None, None, None)
+        else:
+            row = (
+                canonical_url(url),
+                result.status,
+                json.dumps(result.headers),
+                result.encoding,
+                zlib.compress(result.body, 6),
+            )
+        await self.conn.execute(
+            """
+            INSERT OR REPLACE INTO responses(url, status, headers, encoding, body)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            row,
+        )
+        self.pending += 1
+        if self.pending >= self.batch_size:
+            await self.conn.commit()
+            self.pending = 0
+
+    async def get(self, url):
+        """
+        Returns (found, FetchResult or None).
+        """
+        async with self.conn.execute(
+            "SELECT status, headers, encoding, body FROM responses WHERE url = ?",
+            (canonical_url(url),),
+        ) as cur:
+            row = await cur.fetchone()
+
+        if row is None:
+            return False, None
+
+        status, headers, encoding, body = row
+        if status is None:
+            return True, None
+
+        return True, FetchResult(
+            status, json.loads(headers), zlib.decompress(body), encoding
+        )
+
+    async def close(self):
+        await self.conn.commit()
+        await self.conn.close()
+
+
+class RecordingTransport:
+    """
+    Fetches through `inner` and writes every response to the cache.
+    """
+
+    def __init__(self, inner, cache):
+        self.inner = inner
+        self.cache = cache
+
+    async def open(self):
+        await self.inner.open()
+        await self.cache.connect()
+
+    async def close(self):
+        await self.inner.close()
+        await self.cache.close()
+
+    async def get(self, url, timeout=10):
+        try:
+            result = await self.inner.get(url, timeout)
+        except Exception:
+            await self.cache.put(url, None)
+            raise
+        await self.cache.put(url, result)
+        return result
+
+
+class ReplayTransport:
+    """
+    Serves responses from the cache only; never touches the network.
+    Uncached URLs fail like a connection error.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.misses = 0
+
+    async def open(self):
+        await self.cache.connect()
+
+    async def close(self):
+        await self.cache.close()
+
+    async def get(self, url, timeout=10):
+        found, result = await self.cache.get(url)
+        if not found:
+            self.misses += 1
+            raise ConnectionError(f"not in replay cache: {url}")
+        if result is None:
+            raise ConnectionError(f"recorded failure: {url}")
+        return result
@@ -0,0 +1,195 @@
+import re
+from collections import Counter
+from urllib.parse import urlparse
+
+from utils.sketch import CountMinSketch
+
+_ID_SEGMENT = re.compile(r"^(?=.*\d)[0-9a-f-]{8,}$", re.IGNORECASE)
+_DIGITS = re.compile(r"\d+")
+
+
+class TrapDetector:
+    """
+    Guards the frontier against unbounded URL spaces (calendars,
+    pagination, faceted query strings, path loops).
+
+    Each link is reduced to a template: numeric runs become {n}, hex/uuid
+    segments become {id}, query values are dropped (keys kept), and a path
+    position that keeps producing new values is learned as a wildcard *.
+    Distinct URLs per template and per directory are counted in a
+    count-min sketch, so memory stays fixed however many URLs are seen.
+
+    Wildcards are learned per concrete parent path (/shop/a/* and /shop/b/*
+    are separate), never for the first segment, and for the last segment
+    only below an earlier wildcard; a plain directory listing is left to
+    the directory budget.
+
+    Templates where only a numeric ID in the last segment or a single
+    query value varies (/product/{n}, /2024/05/article-{n}, /search?q)
+    are catalogs, not traps: they skip the pattern budget and are held
+    by the directory, length and repeat checks. An all-numeric path
+    (/calendar/{n}/{n}/{n}) still counts against it.
+
+    Usage: key = check(url) before enqueue; add(key) once the URL was new.
+    """
+
+    TRACK_LIMIT = 500_000       # distinct values tracked across all positions
+    REPORT_LIMIT = 10_000       # pruned patterns kept for report()
+
+    def __init__(
+        self,
+        pattern_budget=10_000,
+        directory_budget=50_000,
+        max_url_length=2048,
+        max_segment_repeats=3,
+        wildcard_after=1000,
+        sketch=None,
+    ):
+        self.pattern_budget = pattern_budget
+        self.directory_budget = directory_budget
+        self.max_url_length = max_url_length
+        self.max_segment_repeats = max_segment_repeats
+        self.wildcard_after = wildcard_after
+        self.counts = sketch or CountMinSketch()
+
+        self._values = {}       # (host, parent path) -> distinct shapes seen
+        self._tracked = 0       # values held in _values
+        self._wild = set()      # positions learned as wildcards
+
+        self.pruned = Counter()         # reason -> links rejected
+        self.pruned_patterns = Counter()
+
+    # ---------------- Templates ----------------
+
+    @staticmethod
+    def _shape(segment):
+        if segment.isdigit():
+            return "{n}"
+        if _ID_SEGMENT.match(segment):
+            return "{id}"
+        return _DIGITS.sub("{n}", segment)
+
+    def _shapes(self, host, segments):
+        """
+        Returns the template shapes and, per learnable position, the
+        (position key, shape) pair for _learn(). A position key is the
+        host plus its parent path, with learned wildcards as "*".
+        """
+        shapes = []
+        learnable = []
+        parent = []
+        last = len(segments) - 1
+        for i, segment in enumerate(segments):
+            shape = self._shape(segment)
+            if i and (i < last or "*" in parent):
+                key = (host, tuple(parent))
+                if key in self._wild:
+                    shape = "*"
+                else:
+                    learnable.append((key, shape))
+            shapes.append(shape)
+            parent.append("*" if shape == "*" else segment)
+        return shapes, learnable
+
+    def _learn(self, learnable):
+        for key, shape in learnable:
+            if key in self._wild:
+                continue
+            seen = self._values.get(key)
+            if seen is None:
+                if self._tracked >= self.TRACK_LIMIT:
+                    continue
+                seen = self._values[key] = set()
+            if shape in seen or self._tracked >= self.TRACK_LIMIT:
+                continue
+            seen.add(shape)
+            self._tracked += 1
+            if len(seen) > self.wildcard_after:
+                self._wild.add(key)
+                self._tracked -= len(seen)
+                del self._values[key]
+
+    @staticmethod
+    def _budgeted(shapes, query_keys):
+        """
+        True if the template counts against the pattern budget.
+        """
+        if any("*" in shape or "{id}" in shape for shape in shapes):
+            return True
+        if len(query_keys) > 1:
+            return True
+
+        numeric = [i for i, shape in enumerate(shapes) if "{n}" in shape]
+        if not numeric:
+            return False
+        if query_keys:
+            return True
+        leaf = len(shapes) - 1
+        if numeric[-1] != leaf:
+            return True
+        # a bare number under numeric directories is a calendar/date space
+        return shapes[leaf] == "{n}" and len(numeric) > 1
+
+    # ---------------- Checks ----------------
+
+    def _reject(self, reason, pattern=None):
+        self.pruned[reason] += 1
+        if pattern and (
+            pattern in self.pruned_patterns
+            or len(self.pruned_patterns) < self.REPORT_LIMIT
+        ):
+            self.pruned_patterns[pattern] += 1
+        return None
+
+    def check(self, url):
+        """
+        Returns a key for add() if the URL is within limits, else None.
+        """
+        if len(url) > self.max_url_length:
+            return self._reject("url_length")
+
+        parts = urlparse(url)
+        segments = [s for s in parts.path.split("/") if s]
+
+        if segments and max(Counter(segments).values()) > self.max_segment_repeats:
+            return self._reject("repeated_segment")
+
+        host = parts.netloc.lower()
+        shapes, learnable = self._shapes(host, segments)
+        pattern = f"{host}/{'/'.join(shapes)}"
+        keys = []
+        if parts.query:
+            keys = sorted({kv.split("=", 1)[0] for kv in parts.query.split("&") if kv})
+            pattern += "?" + "&".join(keys)
+
+        directory = f"{host}/{'/'.join(segments[:-1])}"
+
+        if (
+            self._budgeted(shapes, keys)
+            and self.counts.estimate("p:" + pattern) >= self.pattern_budget
+        ):
+            return self._reject("pattern_budget", pattern)
+        if self.counts.estimate("d:" + directory) >= self.directory_budget:
+            return self._reject("directory_budget", directory + "/")
+
+        return pattern, directory, learnable
+
+    def add(self, key):
+        pattern, directory, learnable = key
+        self.counts.add("p:" + pattern)
+        self.counts.add("d:" + directory)
+        self._learn(learnable)
+
+    # ---------------- Reporting ----------------
+
+    def total_pruned(self):
+        return sum(self.pruned.values())
+
+    def report(self, top=10):
+        if not self.pruned:
+            print("[TRAPS] No links pruned.")
+            return
+        reasons = " ".join(f"{r}={n}" for r, n in self.pruned.most_common())
+        print(f"[TRAPS] Pruned {self.total_pruned()} links: {reasons}")
+        for pattern, count in self.pruned_patterns.most_common(top):
+            print(f"        {count:>8}  {pattern}")
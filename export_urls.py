@@ -1,9 +1,51 @@
+import argparse
 import asyncio
-from utils.exporter import URLBatchExporter
+from utils.exporter import URLBatchExporter, StreamingExporter
 from config import DB_PATH
 
 
 async def main():
+    parser = argparse.ArgumentParser(
+        description="Export visited URLs from the crawl database"
+    )
+    parser.add_argument(
+        "--format",
+        choices=["txt", "jsonl.gz", "jsonl.zst", "parquet"],
+        default="txt",
+        help="Output format (txt = legacy batch files)",
+    )
+    parser.add_argument(
+        "--follow",
+        action="store_true",
+        help="Keep running and export new URLs while the crawl runs",
+    )
+    parser.add_argument(
+        "--max-file-mb",
+        type=int,
+        default=64,
+        help="Rotate streaming export files at this size",
+    )
+    parser.add_argument(
+        "--max-file-age",
+        type=float,
+        default=None,
+        help="Also rotate streaming export files after this many seconds",
+    )
+    args = parser.parse_args()
+
+    if args.format == "txt" and args.follow:
+        parser.error("--follow needs a streaming format (jsonl.gz, jsonl.zst or parquet)")
+
+    if args.format != "txt" or args.follow:
+        exporter = StreamingExporter(
+            db_path=DB_PATH,
+            fmt=args.format,
+            max_file_bytes=args.max_file_mb * 1024 * 1024,
+            max_file_age=args.max_file_age,
+        )
+        await exporter.run(follow=args.follow)
+        return
+
     exporter = URLBatchExporter(
         db_path=DB_PATH,
         batch_size=1000,
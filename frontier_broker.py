@@ -0,0 +1,66 @@
+import argparse
+import asyncio
+import json
+
+from storage.broker import FrontierBroker, read_message, send_message
+
+
+async def serve(args):
+    broker = FrontierBroker(
+        path=args.db,
+        visibility_timeout=args.visibility_timeout,
+        report_interval=args.report_interval,
+    )
+    server = await broker.start(args.host, args.port)
+    print(
+        f"📡 Frontier broker listening on {args.host}:{args.port} "
+        f"(state in {args.db}, visibility timeout {args.visibility_timeout:.0f}s)"
+    )
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await broker.stop()
+
+
+async def show_stats(args):
+    reader, writer = await asyncio.open_connection(args.host, args.port)
+    await send_message(writer, {"op": "stats"})
+    print(json.dumps(await read_message(reader), indent=2))
+    writer.close()
+    await writer.wait_closed()
+
+
+def main():
+    cli = argparse.ArgumentParser(
+        description="Shared frontier for distributed crawls (main_async.py --broker)"
+    )
+    cli.add_argument("--host", default="127.0.0.1")
+    cli.add_argument("--port", type=int, default=7700)
+    cli.add_argument(
+        "--db",
+        default="broker.db",
+        help="SQLite file for the queue, seen-set and leases (':memory:' keeps nothing)",
+    )
+    cli.add_argument(
+        "--visibility-timeout",
+        type=float,
+        default=60.0,
+        help="Seconds before an unacknowledged lease is re-queued",
+    )
+    cli.add_argument("--report-interval", type=float, default=10.0)
+    cli.add_argument(
+        "--stats",
+        action="store_true",
+        help="Print per-node stats from a running broker and exit",
+    )
+    args = cli.parse_args()
+
+    try:
+        asyncio.run(show_stats(args) if args.stats else serve(args))
+    except KeyboardInterrupt:
+        print("🛑 Broker stopped.")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ from core.fetcher import Fetcher
 from core.parser import Parser
 from core.crawler import Crawler
 from core.policies import CrawlPolicy
+from core.traps import TrapDetector
 from utils.signals import setup_signal_handlers
 from utils.metrics import Metrics
 from utils.sitemap import fetch_sitemap_urls
@@ -30,6 +31,11 @@ def main():
         action="store_true",
         help="Enable full-site crawl mode (uses sitemap + relaxed depth)",
     )
+    parser.add_argument(
+        "--no-trap-guard",
+        action="store_true",
+        help="Disable crawl-trap detection (stays on with --no-policy)",
+    )
 
 
     args = parser.parse_args()
@@ -52,6 +58,16 @@ def main():
     else:
         print("⚠ Crawl policies DISABLED (experimental mode)")
 
+    traps = None
+    if not args.no_trap_guard:
+        traps = TrapDetector(
+            pattern_budget=TRAP_PATTERN_BUDGET,
+            directory_budget=TRAP_DIRECTORY_BUDGET,
+            max_url_length=MAX_URL_LENGTH,
+            max_segment_repeats=MAX_SEGMENT_REPEATS,
+        )
+        print("🪤 Crawl-trap guard ENABLED")
+
     crawler = Crawler(
     store=store,
     fetcher=fetcher,
@@ -60,6 +76,7 @@ def main():
     auto_commit=AUTO_COMMIT_SECONDS,
     policy=policy,
     metrics=metrics,
+    traps=traps,
                     )
 
 
@@ -1,17 +1,98 @@
+import argparse
 import asyncio
+import os
+import socket
 from config import *
+from storage.broker_store import BrokerStore
 from storage.sqlite_store_async import AsyncSQLiteStore
 from core.fetcher_async import AsyncFetcher
+from core.transport import HTTPTransport, RecordingTransport, ReplayTransport, ResponseCache
 from core.parser import Parser
+from core.processors import BUILTIN_PROCESSORS, ProcessorPipeline
 from core.crawler_async import AsyncCrawler
-from core.policies import CrawlPolicy
+from core.policies import CrawlPolicy, HostScope
+from core.traps import TrapDetector
 from utils.metrics import Metrics
 from utils.concurrency import ConcurrencyController
+from utils.governor import ResourceGovernor
+from utils.seeds import load_host_rules, load_seeds, seed_hosts
 
 
 async def main():
-    # Persistent storage
-    store = AsyncSQLiteStore(DB_PATH)
+    cli = argparse.ArgumentParser(description="Async SQLite-backed web crawler")
+    cli.add_argument(
+        "--seeds",
+        help="Seed file (one URL or domain per line) for multi-site crawls",
+    )
+    cli.add_argument(
+        "--allow",
+        action="append",
+        default=[],
+        help="Allowed host rule: example.com, .example.com or *.example.com (repeatable)",
+    )
+    cli.add_argument(
+        "--allow-file",
+        help="File with one allowed-host rule per line",
+    )
+    cli.add_argument(
+        "--link-graph",
+        action="store_true",
+        help="Record the link graph (edges table) for compute_pagerank.py",
+    )
+    cli.add_argument(
+        "--extract",
+        action="append",
+        default=[],
+        choices=sorted(BUILTIN_PROCESSORS) + ["all"],
+        help="Run a page processor on every crawled page (repeatable; 'all' for every built-in)",
+    )
+    cli.add_argument(
+        "--broker",
+        metavar="HOST:PORT",
+        help="Share the frontier with other nodes through frontier_broker.py",
+    )
+    cli.add_argument(
+        "--node-id",
+        help="Node name in distributed mode (default: hostname-pid)",
+    )
+    cli.add_argument(
+        "--no-trap-guard",
+        action="store_true",
+        help="Disable crawl-trap detection (per-pattern / per-directory budgets)",
+    )
+    mode = cli.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--record",
+        metavar="CACHE_DB",
+        help="Save every response to a compressed replay cache",
+    )
+    mode.add_argument(
+        "--replay",
+        metavar="CACHE_DB",
+        help="Serve responses from a replay cache (no network)",
+    )
+    args = cli.parse_args()
+
+    # Seeds and allowed hosts (default: the hosts of the seeds)
+    seeds = load_seeds(args.seeds) if args.seeds else [START_URL]
+    rules = list(args.allow)
+    if args.allow_file:
+        rules += load_host_rules(args.allow_file)
+    scope = HostScope(rules or seed_hosts(seeds))
+    print(f"🌍 Seeds: {len(seeds)} | allowed host rules: {len(scope)}")
+
+    # Persistent storage: local SQLite, or a shared frontier plus
+    # node-local results in distributed mode
+    if args.broker:
+        node_id = args.node_id or f"{socket.gethostname()}-{os.getpid()}"
+        root, ext = os.path.splitext(DB_PATH)
+        store = BrokerStore(
+            args.broker,
+            node_id,
+            local=AsyncSQLiteStore(f"{root}-{node_id}{ext}", record_edges=args.link_graph),
+        )
+    else:
+        store = AsyncSQLiteStore(DB_PATH, record_edges=args.link_graph)
 
     # Dynamic concurrency controller
     ctrl = ConcurrencyController(
@@ -21,25 +102,63 @@ async def main():
         window=20,
     )
 
+    # Transport: live network, record to cache, or replay from cache
+    transport = None
+    if args.record:
+        transport = RecordingTransport(
+            HTTPTransport({"User-Agent": USER_AGENT}), ResponseCache(args.record)
+        )
+        print(f"⏺ Recording responses → {args.record}")
+    elif args.replay:
+        transport = ReplayTransport(ResponseCache(args.replay))
+        print(f"⏵ Replaying responses from {args.replay}")
+
     # Async fetcher wired to controller
-    fetcher = AsyncFetcher(USER_AGENT, ctrl)
+    fetcher = AsyncFetcher(USER_AGENT, ctrl, transport=transport)
 
-    parser = Parser(DOMAIN)
+    parser = Parser(scope=scope)
     metrics = Metrics(interval=10)
     policy = CrawlPolicy(max_depth=3)
 
-    # IMPORTANT:
-    # worker_count >= max concurrency
+    # Infinite URL spaces: calendars, pagination, faceted query strings
+    traps = None
+    if not args.no_trap_guard:
+        traps = TrapDetector(
+            pattern_budget=TRAP_PATTERN_BUDGET,
+            directory_budget=TRAP_DIRECTORY_BUDGET,
+            max_url_length=MAX_URL_LENGTH,
+            max_segment_repeats=MAX_SEGMENT_REPEATS,
+        )
+
+    # Page processors share the crawler's parse; results go to page_data
+    pipeline = None
+    if args.extract:
+        names = BUILTIN_PROCESSORS if "all" in args.extract else args.extract
+        pipeline = ProcessorPipeline(names)
+        print(f"🧩 Page processors: {', '.join(pipeline.processors)}")
+
+    # Memory budgets: throttle workers / shed links when exceeded
+    governor = ResourceGovernor(
+        max_rss_mb=MAX_RSS_MB,
+        max_frontier=MAX_FRONTIER,
+        max_inflight_mb=MAX_INFLIGHT_MB,
+        fetch_reserve_kb=FETCH_RESERVE_KB,
+    )
+
+    # Worker pool is elastic: it follows ctrl.current (+ worker_slack),
+    # idle workers sleep on an event instead of polling SQLite
     crawler = AsyncCrawler(
         store=store,
         fetcher=fetcher,
         parser=parser,
         policy=policy,
         metrics=metrics,
-        worker_count=25,   # >= max_c
+        governor=governor,
+        traps=traps,
+        pipeline=pipeline,
     )
 
-    await crawler.run(START_URL)
+    await crawler.run(seeds)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,94 @@
+from abc import ABC, abstractmethod
+
+
+class CrawlBackend(ABC):
+    """
+    What AsyncCrawler needs from its store: a frontier, a seen-set and a
+    place for results.
+
+    AsyncSQLiteStore is the single-node backend; BrokerStore shares the
+    frontier and seen-set between nodes through a FrontierBroker.
+
+    queue_len is the number of URLs still outstanding (queued, or handed
+    out and not yet acknowledged); the crawl is over when it reaches 0
+    and no worker is busy.
+    """
+
+    queue_len = 0
+
+    @abstractmethod
+    async def connect(self):
+        pass
+
+    @abstractmethod
+    async def close(self):
+        pass
+
+    # ---------------- Frontier ----------------
+
+    @abstractmethod
+    async def enqueue(self, url, depth):
+        """
+        Returns True if the URL was new to the frontier.
+        """
+
+    async def enqueue_many(self, items):
+        """
+        items: (url, depth) pairs. Returns one added-flag per item.
+        """
+        return [await self.enqueue(url, depth) for url, depth in items]
+
+    @abstractmethod
+    async def dequeue(self):
+        """
+        Returns (url, depth), or None if nothing is available right now.
+        """
+
+    async def ack(self, url):
+        """
+        The dequeued URL is fully processed (its links are enqueued).
+        """
+
+    # ---------------- Results ----------------
+
+    @abstractmethod
+    async def is_visited(self, url):
+        pass
+
+    @abstractmethod
+    async def mark_visited(self, url, depth):
+        pass
+
+    async def set_status(self, url, status):
+        pass
+
+    async def log_error(self, url, error_type, message):
+        pass
+
+    async def record_outcome(self, url, status, rtt, exception=None, attempt=1):
+        """
+        One fetch result: status (None if no response), RTT in seconds and
+        the exception raised, if any.
+        """
+
+    async def flush_outcomes(self):
+        """
+        Write buffered outcomes now (called periodically, not per fetch).
+        """
+
+    async def error_hotspots(self, minutes=5, limit=5):
+        """
+        Recent failures as (host, status, count, avg_rtt_ms) rows.
+        """
+        return []
+
+    async def add_edges(self, src_url, dst_urls):
+        pass
+
+    async def add_page_data(self, url, data):
+        """
+        One processor-pipeline record ({name: value}) for url.
+        """
+
+    async def release_memory(self):
+        pass
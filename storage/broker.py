@@ -0,0 +1,339 @@
+import asyncio
+import json
+import time
+
+import aiosqlite
+
+from storage.url_codec import url_fingerprint
+
+
+# -------------------------------------------------
+# WIRE FORMAT: one JSON object per line, request -> response
+# -------------------------------------------------
+
+async def send_message(writer, message):
+    writer.write(json.dumps(message, separators=(",", ":")).encode() + b"\n")
+    await writer.drain()
+
+
+async def read_message(reader):
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("broker connection closed")
+    return json.loads(line)
+
+
+class FrontierBroker:
+    """
+    Shared frontier + seen-set for several crawler nodes.
+
+    One broker process serves all nodes. Its queue, seen-set (64-bit URL
+    fingerprints) and leases live in SQLite at `path`, so memory stays
+    flat however many URLs are seen and a restarted broker resumes where
+    it stopped (":memory:" keeps nothing).
+
+    Nodes lease URLs in batches; a lease not acknowledged or renewed
+    within visibility_timeout seconds (crashed or stuck node) goes back
+    to the front of the queue. Nodes piggyback their counters on
+    lease/ack requests and the broker aggregates them per node.
+
+    Ops: enqueue, lease, renew, ack, release, stats.
+    """
+
+    def __init__(
+        self,
+        path="broker.db",
+        visibility_timeout=60.0,
+        max_lease=256,
+        report_interval=10.0,
+    ):
+        self.path = path
+        self.visibility_timeout = visibility_timeout
+        self.max_lease = max_lease
+        self.report_interval = report_interval
+        self.conn = None
+
+        # row counts, kept in step with the tables
+        self.queued = 0
+        self.leased = 0
+        self.seen = 0
+
+        self.nodes = {}             # node -> last reported counters
+        self.acked = 0
+        self.redelivered = 0
+
+        self._lock = asyncio.Lock()     # one op's statements + commit at a time
+        self._changed = asyncio.Condition()
+        self._tasks = []
+
+    @property
+    def outstanding(self):
+        return self.queued + self.leased
+
+    async def _notify(self):
+        async with self._changed:
+            self._changed.notify_all()
+
+    # ---------------- State ----------------
+
+    async def connect(self):
+        self.conn = await aiosqlite.connect(self.path)
+        await self.conn.execute("PRAGMA journal_mode=WAL;")
+        await self.conn.execute("PRAGMA synchronous=NORMAL;")
+        await self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS seen (fp INTEGER PRIMARY KEY);
+            CREATE TABLE IF NOT EXISTS queue (
+                seq INTEGER PRIMARY KEY,
+                url TEXT,
+                depth INTEGER,
+                attempt INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS leases (
+                lease_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT,
+                depth INTEGER,
+                attempt INTEGER,
+                node TEXT,
+                deadline REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_leases_deadline ON leases(deadline);
+        """)
+        await self.conn.commit()
+
+        rows = await self.conn.execute_fetchall("""
+            SELECT (SELECT COUNT(*) FROM queue), (SELECT COUNT(*) FROM leases),
+                   (SELECT COUNT(*) FROM seen)
+        """)
+        self.queued, self.leased, self.seen = rows[0]
+        if self.seen:
+            print(
+                f"[BROKER] Resumed {self.path}: queued={self.queued} "
+                f"leased={self.leased} seen={self.seen}"
+            )
+
+    async def _push_front(self, rows):
+        """
+        Put (url, depth, attempt) rows back at the head of the queue, in order.
+        """
+        await self.conn.executemany(
+            """
+            INSERT INTO queue(seq, url, depth, attempt)
+            SELECT COALESCE(MIN(seq), 1) - 1, ?, ?, ? FROM queue
+            """,
+            reversed(rows),
+        )
+        self.queued += len(rows)
+
+    # ---------------- Ops ----------------
+
+    async def op_enqueue(self, msg):
+        items = msg["items"]
+        fps = [url_fingerprint(url) for url, _ in items]
+        async with self._lock:
+            rows = await self.conn.execute_fetchall(
+                """
+                INSERT INTO seen(fp) SELECT value FROM json_each(?) WHERE true
+                ON CONFLICT DO NOTHING RETURNING fp
+                """,
+                (json.dumps(fps),),
+            )
+            new = {row[0] for row in rows}
+            added = []
+            for fp in fps:
+                added.append(fp in new)
+                new.discard(fp)     # a URL listed twice is added once
+            fresh = [(url, depth) for (url, depth), a in zip(items, added) if a]
+            if fresh:
+                await self.conn.executemany(
+                    "INSERT INTO queue(url, depth, attempt) VALUES (?, ?, 1)", fresh
+                )
+                await self.conn.commit()
+            self.seen += len(fresh)
+            self.queued += len(fresh)
+        if fresh:
+            await self._notify()
+        return {"added": added}
+
+    async def op_ack(self, msg):
+        node = msg.get("node", "?")
+        acks = msg.get("acks", ())
+        if acks:
+            # unknown ids expired and were handed to someone else
+            async with self._lock:
+                cur = await self.conn.execute(
+                    "DELETE FROM leases WHERE lease_id IN (SELECT value FROM json_each(?))",
+                    (json.dumps(acks),),
+                )
+                await self.conn.commit()
+                self.acked += cur.rowcount
+                self.leased -= cur.rowcount
+        if "stats" in msg:
+            self.nodes[node] = dict(msg["stats"], last_seen=time.time())
+        if self.outstanding == 0:
+            await self._notify()
+        return {}
+
+    async def op_release(self, msg):
+        """
+        Hand leases back unprocessed (node shutting down).
+        """
+        async with self._lock:
+            rows = await self.conn.execute_fetchall(
+                """
+                DELETE FROM leases WHERE lease_id IN (SELECT value FROM json_each(?))
+                RETURNING lease_id, url, depth, attempt
+                """,
+                (json.dumps(msg.get("leases", ())),),
+            )
+            rows.sort()
+            await self._push_front([row[1:] for row in rows])
+            await self.conn.commit()
+            self.leased -= len(rows)
+        await self._notify()
+        return {}
+
+    async def op_renew(self, msg):
+        """
+        Extend the deadline of a node's leases that are still in progress.
+        """
+        async with self._lock:
+            cur = await self.conn.execute(
+                """
+                UPDATE leases SET deadline = ?
+                WHERE lease_id IN (SELECT value FROM json_each(?)) AND node = ?
+                """,
+                (
+                    time.time() + self.visibility_timeout,
+                    json.dumps(msg.get("leases", ())),
+                    msg.get("node", "?"),
+                ),
+            )
+            await self.conn.commit()
+        return {"renewed": cur.rowcount}
+
+    async def op_lease(self, msg):
+        await self.op_ack(msg)
+
+        node = msg.get("node", "?")
+        n = min(int(msg.get("n", 1)), self.max_lease)
+        wait = float(msg.get("wait", 0))
+
+        # long-poll: other nodes may still add links from their leases
+        if not self.queued and self.leased and wait > 0:
+            try:
+                async with self._changed:
+                    await asyncio.wait_for(
+                        self._changed.wait_for(
+                            lambda: self.queued or not self.leased
+                        ),
+                        wait,
+                    )
+            except asyncio.TimeoutError:
+                pass
+
+        items = []
+        async with self._lock:
+            if self.queued:
+                rows = await self.conn.execute_fetchall(
+                    """
+                    INSERT INTO leases(url, depth, attempt, node, deadline)
+                    SELECT url, depth, attempt, ?, ? FROM queue ORDER BY seq LIMIT ?
+                    RETURNING lease_id, url, depth, attempt
+                    """,
+                    (node, time.time() + self.visibility_timeout, n),
+                )
+                await self.conn.execute(
+                    "DELETE FROM queue WHERE seq IN "
+                    "(SELECT seq FROM queue ORDER BY seq LIMIT ?)",
+                    (len(rows),),
+                )
+                await self.conn.commit()
+                items = sorted(rows)
+                self.queued -= len(items)
+                self.leased += len(items)
+        return {"items": items, "visibility_timeout": self.visibility_timeout}
+
+    async def op_stats(self, msg):
+        return {
+            "queued": self.queued,
+            "leased": self.leased,
+            "seen": self.seen,
+            "acked": self.acked,
+            "redelivered": self.redelivered,
+            "nodes": self.nodes,
+        }
+
+    # ---------------- Background ----------------
+
+    async def reap_expired(self):
+        while True:
+            await asyncio.sleep(1.0)
+            async with self._lock:
+                rows = await self.conn.execute_fetchall(
+                    """
+                    DELETE FROM leases WHERE deadline < ?
+                    RETURNING lease_id, url, depth, attempt + 1
+                    """,
+                    (time.time(),),
+                )
+                if rows:
+                    rows.sort()
+                    await self._push_front([row[1:] for row in rows])
+                    await self.conn.commit()
+                    self.leased -= len(rows)
+                    self.redelivered += len(rows)
+            if rows:
+                print(f"[BROKER] {len(rows)} leases expired → re-queued")
+                await self._notify()
+
+    async def report(self):
+        while True:
+            await asyncio.sleep(self.report_interval)
+            print(
+                f"[BROKER] queued={self.queued} | leased={self.leased} | "
+                f"seen={self.seen} | acked={self.acked} | "
+                f"redelivered={self.redelivered} | nodes={len(self.nodes)}"
+            )
+            now = time.time()
+            for node, s in sorted(self.nodes.items()):
+                print(
+                    f"[BROKER]   {node}: visited={s.get('visited', 0)} "
+                    f"errors={s.get('errors', 0)} rate={s.get('rate', 0):.2f} urls/sec "
+                    f"seen {now - s['last_seen']:.0f}s ago"
+                )
+
+    # ---------------- Server ----------------
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    msg = await read_message(reader)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    break
+                op = getattr(self, f"op_{msg.get('op')}", None)
+                if op is None:
+                    reply = {"error": f"unknown op {msg.get('op')!r}"}
+                else:
+                    reply = await op(msg)
+                    reply["outstanding"] = self.outstanding
+                await send_message(writer, reply)
+        except ConnectionResetError:
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host="127.0.0.1", port=7700):
+        await self.connect()
+        server = await asyncio.start_server(self.handle, host, port)
+        self._tasks = [asyncio.create_task(self.reap_expired())]
+        if self.report_interval:
+            self._tasks.append(asyncio.create_task(self.report()))
+        return server
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self.conn:
+            await self.conn.close()
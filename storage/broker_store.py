@@ -0,0 +1,255 @@
+import asyncio
+import time
+from collections import deque
+
+from storage.backend import CrawlBackend
+from storage.broker import read_message, send_message
+
+
+class _Connection:
+    """
+    One request/response stream to the broker.
+    """
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+        self.lock = asyncio.Lock()
+
+    async def open(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def call(self, message):
+        async with self.lock:
+            await send_message(self.writer, message)
+            reply = await read_message(self.reader)
+        if "error" in reply:
+            raise RuntimeError(f"broker: {reply['error']}")
+        return reply
+
+    async def close(self):
+        if self.writer:
+            self.writer.close()
+            await self.writer.wait_closed()
+
+
+class BrokerStore(CrawlBackend):
+    """
+    Crawl backend for distributed mode: the frontier and seen-set live in
+    a FrontierBroker shared by all nodes; visited pages, statuses, errors
+    and edges go to this node's own `local` store (an AsyncSQLiteStore).
+
+    Each lease request asks for one URL per worker currently waiting in
+    dequeue() (at most lease_size), so a lease's visibility timeout starts
+    when a worker is ready for it rather than while it sits in a buffer.
+    Acks are sent in batches of ack_batch (and ride along with the next
+    lease request). Leases this node still holds are renewed every third
+    of the broker's visibility timeout, so a slow page is not handed to
+    another node while it is being crawled.
+    """
+
+    def __init__(
+        self,
+        address,
+        node_id,
+        local=None,
+        lease_size=16,
+        ack_batch=32,
+        wait=1.0,
+    ):
+        host, _, port = address.rpartition(":")
+        self.node_id = node_id
+        self.local = local
+        self.lease_size = lease_size
+        self.ack_batch = ack_batch
+        self.wait = wait
+
+        # leases block for up to `wait` seconds, so they get their own stream
+        self._rpc = _Connection(host or "127.0.0.1", int(port))
+        self._lease = _Connection(host or "127.0.0.1", int(port))
+
+        self._buffer = deque()      # leased, not yet handed to a worker
+        self._waiting = 0           # workers inside dequeue()
+        self._lease_ids = {}        # url -> (lease id, delivery attempt)
+        self._acks = []
+        self._renew_every = None    # a third of the broker's visibility timeout
+        self._renew_task = None
+
+        self.queue_len = 0
+        self.visited = 0
+        self.errors = 0
+        self._started = time.time()
+
+    async def connect(self):
+        await self._rpc.open()
+        await self._lease.open()
+        if self.local:
+            await self.local.connect()
+        print(f"[BROKER] Node {self.node_id} connected to {self._rpc.host}:{self._rpc.port}")
+
+    def _stats(self):
+        uptime = time.time() - self._started
+        return {
+            "visited": self.visited,
+            "errors": self.errors,
+            "rate": round(self.visited / uptime, 2) if uptime > 0 else 0.0,
+        }
+
+    def _take_acks(self):
+        acks, self._acks = self._acks, []
+        return acks
+
+    # ---------------- Frontier ----------------
+
+    async def enqueue(self, url, depth):
+        return (await self.enqueue_many([(url, depth)]))[0]
+
+    async def enqueue_many(self, items):
+        if not items:
+            return []
+        reply = await self._rpc.call({"op": "enqueue", "items": items})
+        self.queue_len = reply["outstanding"]
+        return reply["added"]
+
+    async def dequeue(self):
+        self._waiting += 1
+        try:
+            if not self._buffer:
+                async with self._lease.lock:
+                    # another worker may have refilled the buffer meanwhile
+                    if not self._buffer:
+                        await self._refill()
+        finally:
+            self._waiting -= 1
+
+        if not self._buffer:
+            return None
+
+        lease_id, url, depth, attempt = self._buffer.popleft()
+        self._lease_ids[url] = (lease_id, attempt)
+        return url, depth
+
+    async def _refill(self):
+        await send_message(self._lease.writer, {
+            "op": "lease",
+            "node": self.node_id,
+            "n": max(1, min(self.lease_size, self._waiting)),
+            "wait": self.wait,
+            "acks": self._take_acks(),
+            "stats": self._stats(),
+        })
+        reply = await read_message(self._lease.reader)
+        if "error" in reply:
+            raise RuntimeError(f"broker: {reply['error']}")
+        self._buffer.extend(reply["items"])
+        self.queue_len = reply["outstanding"]
+        if self._renew_task is None:
+            self._renew_every = reply["visibility_timeout"] / 3
+            self._renew_task = asyncio.create_task(self._renew_leases())
+
+    async def ack(self, url):
+        if self.local:
+            await self.local.ack(url)
+        lease = self._lease_ids.pop(url, None)
+        if lease is None:
+            return
+        self._acks.append(lease[0])
+        if len(self._acks) >= self.ack_batch:
+            await self.flush_acks()
+
+    async def flush_acks(self):
+        reply = await self._rpc.call({
+            "op": "ack",
+            "node": self.node_id,
+            "acks": self._take_acks(),
+            "stats": self._stats(),
+        })
+        self.queue_len = reply["outstanding"]
+
+    def _held(self):
+        """
+        Lease ids leased to this node whose ack has not reached the broker.
+        """
+        return [item[0] for item in self._buffer] + [
+            lease_id for lease_id, _ in self._lease_ids.values()
+        ] + self._acks
+
+    async def _renew_leases(self):
+        try:
+            while True:
+                await asyncio.sleep(self._renew_every)
+                held = self._held()
+                if held:
+                    await self._rpc.call(
+                        {"op": "renew", "node": self.node_id, "leases": held}
+                    )
+        except asyncio.CancelledError:
+            pass
+
+    # ---------------- Results (node-local) ----------------
+
+    async def is_visited(self, url):
+        # the broker hands each URL out once; a redelivered lease may
+        # still have been finished here before the ack got through
+        return await self.local.is_visited(url) if self.local else False
+
+    async def mark_visited(self, url, depth):
+        self.visited += 1
+        if self.local:
+            await self.local.mark_visited(url, depth)
+
+    async def set_status(self, url, status):
+        if self.local:
+            await self.local.set_status(url, status)
+
+    async def log_error(self, url, error_type, message):
+        self.errors += 1
+        if self.local:
+            await self.local.log_error(url, error_type, message)
+
+    async def record_outcome(self, url, status, rtt, exception=None, attempt=1):
+        if exception is not None or status != 200:
+            self.errors += 1
+        # redelivered leases (expired on another node) count as retries
+        lease = self._lease_ids.get(url)
+        if lease is not None:
+            attempt = max(attempt, lease[1])
+        if self.local:
+            await self.local.record_outcome(url, status, rtt, exception, attempt)
+
+    async def flush_outcomes(self):
+        if self.local:
+            await self.local.flush_outcomes()
+
+    async def error_hotspots(self, minutes=5, limit=5):
+        return await self.local.error_hotspots(minutes, limit) if self.local else []
+
+    async def add_edges(self, src_url, dst_urls):
+        if self.local:
+            await self.local.add_edges(src_url, dst_urls)
+
+    async def add_page_data(self, url, data):
+        if self.local:
+            await self.local.add_page_data(url, data)
+
+    async def release_memory(self):
+        if self.local:
+            await self.local.release_memory()
+
+    async def close(self):
+        if self._renew_task:
+            self._renew_task.cancel()
+            await asyncio.gather(self._renew_task, return_exceptions=True)
+        try:
+            await self.flush_acks()
+            # unprocessed leases go straight back instead of timing out
+            pending = self._held()
+            if pending:
+                await self._rpc.call({"op": "release", "leases": pending})
+        finally:
+            await self._rpc.close()
+            await self._lease.close()
+            if self.local:
+                await self.local.close()
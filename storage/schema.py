@@ -0,0 +1,258 @@
+"""
+Compact URL schema shared by the sync and async SQLite stores.
+
+URLs are never stored whole: the scheme://netloc prefix lives once in
+`hosts`, the directory part of the path once in `dirs`, rows keep only
+the leaf (last segment + query), and lookups go through a 64-bit
+fingerprint (see storage/url_codec.py).
+"""
+
+TABLES = (
+    # Host dictionary: scheme://netloc stored once
+    """
+    CREATE TABLE IF NOT EXISTS hosts (
+        id INTEGER PRIMARY KEY,
+        host TEXT UNIQUE
+    )
+    """,
+    # Directory dictionary: path up to the last "/", shared by all hosts
+    """
+    CREATE TABLE IF NOT EXISTS dirs (
+        id INTEGER PRIMARY KEY,
+        dir TEXT UNIQUE
+    )
+    """,
+    # Visited table with stable ordering, keyed by URL fingerprint
+    """
+    CREATE TABLE IF NOT EXISTS visited (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        fp INTEGER NOT NULL UNIQUE,
+        host_id INTEGER,
+        dir_id INTEGER,
+        leaf TEXT,
+        depth INTEGER,
+        visited_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        status INTEGER
+    )
+    """,
+    # Queue table (FIFO by id, highest priority first within a host)
+    """
+    CREATE TABLE IF NOT EXISTS queue (
+        id INTEGER PRIMARY KEY,
+        fp INTEGER NOT NULL UNIQUE,
+        host_id INTEGER,
+        dir_id INTEGER,
+        leaf TEXT,
+        depth INTEGER,
+        enqueued_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        priority REAL DEFAULT 0
+    )
+    """,
+    # Failed fetches; status is NULL when no response arrived (see exception)
+    """
+    CREATE TABLE IF NOT EXISTS errors (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        host_id INTEGER,
+        dir_id INTEGER,
+        leaf TEXT,
+        error_type TEXT,
+        message TEXT,
+        occurred_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        status INTEGER,
+        exception TEXT,
+        rtt_ms REAL,
+        attempt INTEGER
+    )
+    """,
+    # Every fetch outcome, pre-aggregated per minute / host / status
+    # (status 0 = no response). Maintained incrementally by upserts.
+    """
+    CREATE TABLE IF NOT EXISTS outcome_rollup (
+        minute INTEGER NOT NULL,
+        host_id INTEGER NOT NULL,
+        status INTEGER NOT NULL,
+        responses INTEGER NOT NULL,
+        rtt_ms_sum REAL NOT NULL,
+        PRIMARY KEY (minute, host_id, status)
+    ) WITHOUT ROWID
+    """,
+    # Link graph: (source fp, target fp), only filled when edges are recorded
+    """
+    CREATE TABLE IF NOT EXISTS edges (
+        src INTEGER NOT NULL,
+        dst INTEGER NOT NULL,
+        PRIMARY KEY (src, dst)
+    ) WITHOUT ROWID
+    """,
+    # Output of compute_pagerank.py
+    """
+    CREATE TABLE IF NOT EXISTS page_scores (
+        fp INTEGER PRIMARY KEY,
+        indegree INTEGER,
+        pagerank REAL
+    )
+    """,
+    # Processor pipeline output (core/processors.py), JSON per page
+    """
+    CREATE TABLE IF NOT EXISTS page_data (
+        fp INTEGER PRIMARY KEY,
+        data TEXT NOT NULL,
+        extracted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS graph_meta (
+        key TEXT PRIMARY KEY,
+        value
+    )
+    """,
+)
+
+# Created after column upgrades, since they may reference new columns
+INDEXES = (
+    "DROP INDEX IF EXISTS queue_host_idx",
+    # Per-host sub-queues: next URL for a host is one index probe
+    """
+    CREATE INDEX IF NOT EXISTS queue_host_prio_idx
+    ON queue(host_id, priority DESC, id)
+    """,
+)
+
+# Columns added after the compact schema shipped: (table, column, type)
+ADDED_COLUMNS = (
+    ("queue", "priority", "REAL DEFAULT 0"),
+    ("errors", "status", "INTEGER"),
+    ("errors", "exception", "TEXT"),
+    ("errors", "rtt_ms", "REAL"),
+    ("errors", "attempt", "INTEGER"),
+)
+
+URL_TABLES = ("visited", "queue", "errors")
+
+# Indexes that would follow a table renamed to legacy_* (and be dropped with it)
+TABLE_INDEXES = {
+    "queue": ("queue_host_idx", "queue_host_prio_idx"),
+}
+
+
+def is_legacy(columns):
+    """
+    Tables keyed by full URL, or by host + whole path (before `dirs`),
+    are migrated by copying.
+    """
+    return "url" in columns or "path" in columns
+
+
+def add_columns_sql(existing):
+    """
+    ALTER statements for compact tables that predate ADDED_COLUMNS.
+    """
+    return [
+        f"ALTER TABLE {table} ADD COLUMN {column} {decl}"
+        for table, column, decl in ADDED_COLUMNS
+        if existing.get(table)
+        and not is_legacy(existing[table])
+        and column not in existing[table]
+    ]
+
+
+def rename_legacy_sql(existing):
+    """
+    Statements that move pre-compact tables out of the way.
+
+    `existing` maps table name -> set of column names (empty if absent).
+    """
+    stmts = []
+    for table in URL_TABLES:
+        if is_legacy(existing.get(table, ())):
+            stmts += [f"DROP INDEX IF EXISTS {name}" for name in TABLE_INDEXES.get(table, ())]
+            stmts.append(f"ALTER TABLE {table} RENAME TO legacy_{table}")
+    return stmts
+
+
+def migrate_legacy_sql(existing):
+    """
+    Statements that copy legacy rows into the compact tables.
+    Requires the SQL functions in url_codec.SQL_FUNCTIONS to be registered.
+    """
+    legacy = {t: cols for t, cols in existing.items() if is_legacy(cols)}
+    stmts = []
+
+    def col(table, name, fallback):
+        return f"x.{name}" if name in legacy[table] else fallback
+
+    def source(table):
+        """
+        (FROM clause, fp, host_id, path) expressions for one legacy table.
+        """
+        if "url" in legacy[table]:
+            return (
+                f"legacy_{table} x JOIN hosts h ON h.host = url_host(x.url)",
+                "url_fp(x.url)", "h.id", "url_path(x.url)",
+            )
+        return f"legacy_{table} x", col(table, "fp", "NULL"), "x.host_id", "x.path"
+
+    for table in legacy:
+        if "url" in legacy[table]:
+            stmts.append(f"""
+                INSERT OR IGNORE INTO hosts(host)
+                SELECT DISTINCT url_host(url) FROM legacy_{table}
+            """)
+        from_, _, _, path = source(table)
+        stmts.append(f"""
+            INSERT OR IGNORE INTO dirs(dir)
+            SELECT DISTINCT path_dir({path}) FROM {from_}
+        """)
+
+    if "visited" in legacy:
+        from_, fp, host_id, path = source("visited")
+        stmts.append(f"""
+            INSERT OR IGNORE INTO visited(
+                id, fp, host_id, dir_id, leaf, depth, visited_at, status
+            )
+            SELECT {col("visited", "id", "x.rowid")}, {fp}, {host_id},
+                   d.id, path_leaf({path}), x.depth,
+                   {col("visited", "visited_at", "CURRENT_TIMESTAMP")},
+                   {col("visited", "status", "NULL")}
+            FROM {from_}
+            JOIN dirs d ON d.dir = path_dir({path})
+            ORDER BY x.rowid
+        """)
+
+    if "queue" in legacy:
+        from_, fp, host_id, path = source("queue")
+        stmts.append(f"""
+            INSERT OR IGNORE INTO queue(
+                id, fp, host_id, dir_id, leaf, depth, enqueued_at, priority
+            )
+            SELECT {col("queue", "id", "NULL")}, {fp}, {host_id},
+                   d.id, path_leaf({path}), x.depth,
+                   {col("queue", "enqueued_at", "CURRENT_TIMESTAMP")},
+                   {col("queue", "priority", "0")}
+            FROM {from_}
+            JOIN dirs d ON d.dir = path_dir({path})
+            ORDER BY x.rowid
+        """)
+
+    if "errors" in legacy:
+        from_, _, host_id, path = source("errors")
+        stmts.append(f"""
+            INSERT INTO errors(
+                id, host_id, dir_id, leaf, error_type, message, occurred_at,
+                status, exception, rtt_ms, attempt
+            )
+            SELECT x.id, {host_id}, d.id, path_leaf({path}), x.error_type,
+                   x.message, x.occurred_at,
+                   {col("errors", "status", "NULL")},
+                   {col("errors", "exception", "NULL")},
+                   {col("errors", "rtt_ms", "NULL")},
+                   {col("errors", "attempt", "NULL")}
+            FROM {from_}
+            JOIN dirs d ON d.dir = path_dir({path})
+            ORDER BY x.id
+        """)
+
+    for table in legacy:
+        stmts.append(f"DROP TABLE legacy_{table}")
+
+    return stmts
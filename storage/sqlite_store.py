@@ -1,11 +1,28 @@
 import sqlite3
 import time
 
+from storage.schema import (
+    INDEXES,
+    TABLES,
+    URL_TABLES,
+    add_columns_sql,
+    migrate_legacy_sql,
+    rename_legacy_sql,
+)
+from storage.url_codec import SQL_FUNCTIONS, split_path, split_url, url_fingerprint
+
 class SQLiteStore:
+    # directory ids are cached up to this many entries, then the cache restarts
+    DIR_CACHE_SIZE = 100_000
+
     def __init__(self, db_path, batch_size=50):
         self.conn = sqlite3.connect(db_path, check_same_thread=False)
         self.batch_size = batch_size
         self.pending_writes = 0
+        self._host_ids = {}
+        self._dir_ids = {}
+        self.fp_collisions = 0
+        self._collided = set()
         self._init_pragmas()
         self._init_tables()
 
@@ -24,49 +41,121 @@ class SQLiteStore:
 
 
     def _init_tables(self):
+        for name, fn in SQL_FUNCTIONS:
+            self.conn.create_function(name, 1, fn, deterministic=True)
+
+        existing = {t: self._columns(t) for t in URL_TABLES}
         cur = self.conn.cursor()
 
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS visited (
-                url TEXT PRIMARY KEY,
-                depth INTEGER
+        for stmt in rename_legacy_sql(existing):
+            cur.execute(stmt)
+
+        for stmt in TABLES:
+            cur.execute(stmt)
+
+        for stmt in add_columns_sql(existing) + list(INDEXES):
+            cur.execute(stmt)
+
+        migration = migrate_legacy_sql(existing)
+        if migration:
+            print("[SQLite] Migrating URL tables to compact schema...")
+            for stmt in migration:
+                cur.execute(stmt)
+
+        self.conn.commit()
+
+    def _columns(self, table):
+        cur = self.conn.execute(f"PRAGMA table_info({table})")
+        return {row[1] for row in cur.fetchall()}
+
+    def _encode(self, url):
+        """
+        URL -> (fingerprint, host_id, dir_id, leaf)
+        """
+        host, path = split_url(url)
+        directory, leaf = split_path(path)
+        host_id = self._host_ids.get(host)
+
+        if host_id is None:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO hosts(host) VALUES (?)", (host,)
             )
-        """)
+            host_id = self.conn.execute(
+                "SELECT id FROM hosts WHERE host = ?", (host,)
+            ).fetchone()[0]
+            self._host_ids[host] = host_id
 
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS queue (
-                url TEXT PRIMARY KEY,
-                depth INTEGER
+        dir_id = self._dir_ids.get(directory)
+        if dir_id is None:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO dirs(dir) VALUES (?)", (directory,)
             )
-        """)
+            dir_id = self.conn.execute(
+                "SELECT id FROM dirs WHERE dir = ?", (directory,)
+            ).fetchone()[0]
+            if len(self._dir_ids) >= self.DIR_CACHE_SIZE:
+                self._dir_ids.clear()
+            self._dir_ids[directory] = dir_id
 
-        self.conn.commit()
+        return url_fingerprint(url), host_id, dir_id, leaf
 
     def enqueue(self, url, depth):
-        self.conn.execute(
-            "INSERT OR IGNORE INTO queue(url, depth) VALUES (?, ?)",
-            (url, depth),
-        )
+        """
+        Returns True if the URL was newly added (not already queued or visited).
+        """
+        fp, host_id, dir_id, leaf = self._encode(url)
+        if url in self._collided:
+            return False
+        # a row comes back if inserted, or if the fp is queued for another URL
+        rows = self.conn.execute(
+            """
+            INSERT INTO queue(fp, host_id, dir_id, leaf, depth, priority)
+            SELECT ?, ?, ?, ?, ?,
+                   COALESCE((SELECT pagerank FROM page_scores WHERE fp = ?), 0)
+            WHERE NOT EXISTS (
+                SELECT 1 FROM visited
+                WHERE fp = ? AND host_id = ? AND dir_id = ? AND leaf = ?
+            )
+            ON CONFLICT(fp) DO UPDATE SET depth = queue.depth
+            WHERE queue.host_id IS NOT excluded.host_id
+               OR queue.dir_id IS NOT excluded.dir_id
+               OR queue.leaf IS NOT excluded.leaf
+            RETURNING host_id, dir_id, leaf
+            """,
+            (fp, host_id, dir_id, leaf, depth, fp, fp, host_id, dir_id, leaf),
+        ).fetchall()
         self._mark_write()
+        row = rows[0] if rows else None
+        added = row == (host_id, dir_id, leaf)
+        if row is not None and not added:
+            self._collision(url)
+        return added
 
     def dequeue(self):
         cur = self.conn.cursor()
         cur.execute(
-            "SELECT url, depth FROM queue ORDER BY rowid LIMIT 1"
+            """
+            SELECT q.id, h.host || d.dir || q.leaf, q.depth
+            FROM queue q
+            JOIN hosts h ON h.id = q.host_id
+            JOIN dirs d ON d.id = q.dir_id
+            ORDER BY q.id
+            LIMIT 1
+            """
         )
         row = cur.fetchone()
         if row:
             self.conn.execute(
-                "DELETE FROM queue WHERE url = ?", (row[0],)
+                "DELETE FROM queue WHERE id = ?", (row[0],)
             )
-            return row
+            return row[1], row[2]
         return None
 
 
     def mark_visited(self, url, depth):
         self.conn.execute(
-            "INSERT OR IGNORE INTO visited(url, depth) VALUES (?, ?)",
-            (url, depth),
+            "INSERT OR IGNORE INTO visited(fp, host_id, dir_id, leaf, depth) VALUES (?, ?, ?, ?, ?)",
+            (*self._encode(url), depth),
         )
         self._mark_write()
 
@@ -76,11 +165,24 @@ class SQLiteStore:
             self.commit()
 
     def is_visited(self, url):
-        cur = self.conn.cursor()
-        cur.execute(
-            "SELECT 1 FROM visited WHERE url = ? LIMIT 1", (url,)
-        )
-        return cur.fetchone() is not None
+        fp, *parts = self._encode(url)
+        row = self.conn.execute(
+            "SELECT host_id, dir_id, leaf FROM visited WHERE fp = ?", (fp,)
+        ).fetchone()
+        if row is None:
+            return False
+        if row != tuple(parts):
+            # not this URL: it cannot be stored, so it is skipped
+            self._collision(url)
+        return True
+
+    def _collision(self, url):
+        # two URLs share a 64-bit fingerprint; the second is reported once
+        if url in self._collided:
+            return
+        self._collided.add(url)
+        self.fp_collisions += 1
+        print(f"[SQLite] Fingerprint collision #{self.fp_collisions}, skipping: {url}")
 
     def commit(self):
         self.conn.commit()
@@ -1,81 +1,261 @@
+import asyncio
 import aiosqlite
+import json
 import time
+from collections import deque
 
+from storage.backend import CrawlBackend
+from storage.schema import (
+    INDEXES,
+    TABLES,
+    URL_TABLES,
+    add_columns_sql,
+    migrate_legacy_sql,
+    rename_legacy_sql,
+)
+from storage.url_codec import SQL_FUNCTIONS, split_path, split_url, url_fingerprint
 
-class AsyncSQLiteStore:
-    def __init__(self, db_path, batch_size=50):
+
+class AsyncSQLiteStore(CrawlBackend):
+    # directory ids are cached up to this many entries, then the cache restarts
+    DIR_CACHE_SIZE = 100_000
+
+    def __init__(
+        self,
+        db_path,
+        batch_size=50,
+        record_edges=False,
+        edge_batch_size=5000,
+        outcome_batch_size=500,
+        page_batch_size=200,
+    ):
         self.db_path = db_path
         self.batch_size = batch_size
+        self.record_edges = record_edges
+        self.edge_batch_size = edge_batch_size
+        self.outcome_batch_size = outcome_batch_size
+        self.page_batch_size = page_batch_size
+        self._edges = []
+        self._page_data = []
+        # buffered error rows and (minute, host_id, status) -> [responses, rtt_ms_sum]
+        self._error_rows = []
+        self._rollup = {}
+        self._outcomes = 0
         self.pending = 0
         self.conn = None
+        self._host_ids = {}
+        self._hosts = {}
+        self._dir_ids = {}
+        # fp -> [host_id, dir_id, leaf, depth, status]: claimed by a worker,
+        # row not written until the URL is acked (after its page data)
+        self._claims = {}
+        self._acked = []
+        # host_ids with queued URLs, in round-robin order
+        self._active_hosts = deque()
+        self._active_set = set()
+        # SELECT + DELETE must not interleave across workers
+        self._dequeue_lock = asyncio.Lock()
+        # queue row count tracked incrementally (avoids COUNT(*) scans)
+        self.queue_len = 0
+        self.fp_collisions = 0
+        self._collided = set()
 
     async def connect(self):
         self.conn = await aiosqlite.connect(self.db_path)
         await self._init_pragmas()
         await self._init_tables()
 
+        async with self.conn.execute("SELECT COUNT(*) FROM queue") as cur:
+            self.queue_len = (await cur.fetchone())[0]
+        await self._load_active_hosts()
+
     async def _init_pragmas(self):
         await self.conn.execute("PRAGMA journal_mode=WAL;")
         await self.conn.execute("PRAGMA synchronous=NORMAL;")
         await self.conn.commit()
 
     async def _init_tables(self):
-        # Visited table with stable ordering
-        await self.conn.execute("""
-            CREATE TABLE IF NOT EXISTS visited (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                url TEXT UNIQUE,
-                depth INTEGER,
-                visited_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-
-        # Queue table (FIFO)
-        await self.conn.execute("""
-            CREATE TABLE IF NOT EXISTS queue (
-                url TEXT PRIMARY KEY,
-                depth INTEGER,
-                enqueued_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        for name, fn in SQL_FUNCTIONS:
+            await self.conn.create_function(name, 1, fn, deterministic=True)
+
+        existing = {t: await self._columns(t) for t in URL_TABLES}
+
+        for stmt in rename_legacy_sql(existing):
+            await self.conn.execute(stmt)
+
+        for stmt in TABLES:
+            await self.conn.execute(stmt)
+
+        for stmt in add_columns_sql(existing) + list(INDEXES):
+            await self.conn.execute(stmt)
+
+        migration = migrate_legacy_sql(existing)
+        if migration:
+            print("[SQLite] Migrating URL tables to compact schema...")
+            for stmt in migration:
+                await self.conn.execute(stmt)
+
+        await self.conn.commit()
+
+    async def _columns(self, table):
+        async with self.conn.execute(f"PRAGMA table_info({table})") as cur:
+            return {row[1] for row in await cur.fetchall()}
+
+    # ---------------- Host / directory dictionaries ----------------
+
+    async def _encode(self, url):
+        """
+        URL -> (fingerprint, host_id, dir_id, leaf)
+        """
+        host, path = split_url(url)
+        directory, leaf = split_path(path)
+        return (
+            url_fingerprint(url),
+            await self._host_id(host),
+            await self._dir_id(directory),
+            leaf,
+        )
+
+    async def _host_id(self, host):
+        host_id = self._host_ids.get(host)
+
+        if host_id is None:
+            await self.conn.execute(
+                "INSERT OR IGNORE INTO hosts(host) VALUES (?)", (host,)
             )
-        """)
-
-        await self.conn.execute("""
-            CREATE TABLE IF NOT EXISTS errors (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                url TEXT,
-                error_type TEXT,
-                message TEXT,
-                occurred_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            async with self.conn.execute(
+                "SELECT id FROM hosts WHERE host = ?", (host,)
+            ) as cur:
+                host_id = (await cur.fetchone())[0]
+            self._host_ids[host] = host_id
+            self._hosts[host_id] = host
+
+        return host_id
+
+    async def _dir_id(self, directory):
+        dir_id = self._dir_ids.get(directory)
+
+        if dir_id is None:
+            await self.conn.execute(
+                "INSERT OR IGNORE INTO dirs(dir) VALUES (?)", (directory,)
             )
-        """)
+            async with self.conn.execute(
+                "SELECT id FROM dirs WHERE dir = ?", (directory,)
+            ) as cur:
+                dir_id = (await cur.fetchone())[0]
+            if len(self._dir_ids) >= self.DIR_CACHE_SIZE:
+                self._dir_ids.clear()
+            self._dir_ids[directory] = dir_id
 
+        return dir_id
 
-        await self.conn.commit()
+    async def _host(self, host_id):
+        host = self._hosts.get(host_id)
+        if host is None:
+            async with self.conn.execute(
+                "SELECT host FROM hosts WHERE id = ?", (host_id,)
+            ) as cur:
+                host = (await cur.fetchone())[0]
+            self._hosts[host_id] = host
+            self._host_ids[host] = host_id
+        return host
+
+    async def _load_active_hosts(self):
+        async with self.conn.execute(
+            "SELECT DISTINCT host_id FROM queue"
+        ) as cur:
+            host_ids = [row[0] for row in await cur.fetchall()]
+        self._active_hosts = deque(host_ids)
+        self._active_set = set(host_ids)
+        if not host_ids:
+            self.queue_len = 0
 
     # ---------------- Queue operations ----------------
 
     async def enqueue(self, url, depth):
-        await self.conn.execute(
-            "INSERT OR IGNORE INTO queue(url, depth) VALUES (?, ?)",
-            (url, depth),
+        """
+        Returns True if the URL was newly added to the queue (not already
+        queued or visited).
+        """
+        fp, host_id, dir_id, leaf = await self._encode(url)
+        if fp in self._claims or url in self._collided:
+            return False
+        # a row comes back if inserted, or if the fp is queued for another
+        # URL; execute_fetchall so no other worker commits while the
+        # RETURNING statement is open
+        rows = await self.conn.execute_fetchall(
+            """
+            INSERT INTO queue(fp, host_id, dir_id, leaf, depth, priority)
+            SELECT ?, ?, ?, ?, ?,
+                   COALESCE((SELECT pagerank FROM page_scores WHERE fp = ?), 0)
+            WHERE NOT EXISTS (
+                SELECT 1 FROM visited
+                WHERE fp = ? AND host_id = ? AND dir_id = ? AND leaf = ?
+            )
+            ON CONFLICT(fp) DO UPDATE SET depth = queue.depth
+            WHERE queue.host_id IS NOT excluded.host_id
+               OR queue.dir_id IS NOT excluded.dir_id
+               OR queue.leaf IS NOT excluded.leaf
+            RETURNING host_id, dir_id, leaf
+            """,
+            (fp, host_id, dir_id, leaf, depth, fp, fp, host_id, dir_id, leaf),
         )
+        row = rows[0] if rows else None
+        added = row == (host_id, dir_id, leaf)
+        if row is not None and not added:
+            self._collision(url)
+        self.queue_len += added
+        if added and host_id not in self._active_set:
+            self._active_hosts.append(host_id)
+            self._active_set.add(host_id)
         await self._maybe_commit()
+        return added
 
     async def dequeue(self):
-        async with self.conn.execute(
-            "SELECT url, depth FROM queue ORDER BY rowid LIMIT 1"
-        ) as cur:
-            row = await cur.fetchone()
+        """
+        Next URL, rotating round-robin across hosts so one slow or huge
+        host cannot monopolise the workers. Within a host: highest
+        priority first (see compute_pagerank.py), then FIFO.
+        """
+        async with self._dequeue_lock:
+            if not self._active_hosts and self.queue_len > 0:
+                await self._load_active_hosts()
 
-        if row:
-            await self.conn.execute(
-                "DELETE FROM queue WHERE url = ?",
-                (row[0],),
-            )
-            await self._maybe_commit()
-            return row
+            while self._active_hosts:
+                host_id = self._active_hosts[0]
+                self._active_hosts.rotate(-1)
+
+                async with self.conn.execute(
+                    """
+                    SELECT q.id, d.dir || q.leaf, q.depth
+                    FROM queue q
+                    JOIN dirs d ON d.id = q.dir_id
+                    WHERE q.host_id = ?
+                    ORDER BY q.priority DESC, q.id
+                    LIMIT 1
+                    """,
+                    (host_id,),
+                ) as cur:
+                    row = await cur.fetchone()
 
-        return None
+                if row is None:
+                    # host drained: it is now last in the rotation
+                    self._active_hosts.pop()
+                    self._active_set.discard(host_id)
+                    continue
+
+                await self.conn.execute(
+                    "DELETE FROM queue WHERE id = ?",
+                    (row[0],),
+                )
+                self.queue_len -= 1
+                url = await self._host(host_id) + row[1]
+                break
+            else:
+                return None
+
+        await self._maybe_commit()
+        return url, row[2]
 
     async def queue_size(self):
         async with self.conn.execute(
@@ -87,31 +267,93 @@ class AsyncSQLiteStore:
     # ---------------- Visited operations ----------------
 
     async def mark_visited(self, url, depth):
+        """
+        Claim the URL; the visited row is written once the URL is acked,
+        after its page data, so a committed row always carries its status
+        and page record (the streaming exporter reads each row once).
+        """
+        fp, host_id, dir_id, leaf = await self._encode(url)
+        self._claims[fp] = [host_id, dir_id, leaf, depth, None]
+
+    async def set_status(self, url, status):
+        fp = url_fingerprint(url)
+        claim = self._claims.get(fp)
+        if claim is not None:
+            claim[4] = status
+            return
         await self.conn.execute(
+            "UPDATE visited SET status = ? WHERE fp = ?", (status, fp)
+        )
+        await self._maybe_commit()
+
+    async def ack(self, url):
+        fp = url_fingerprint(url)
+        if fp not in self._claims:
+            return
+        self._acked.append(fp)
+        if len(self._acked) >= self.batch_size:
+            await self.flush_visited()
+
+    async def flush_visited(self):
+        """
+        Write the visited rows of acked URLs, after their page data.
+        """
+        if not self._acked:
+            return
+
+        acked, self._acked = self._acked, []
+        await self.flush_page_data()
+        await self._write_visited([(fp, *self._claims.pop(fp)) for fp in acked])
+        await self._maybe_commit()
+
+    async def _write_visited(self, rows):
+        await self.conn.executemany(
             """
-            INSERT OR IGNORE INTO visited(url, depth)
-            VALUES (?, ?)
+            INSERT OR IGNORE INTO visited(fp, host_id, dir_id, leaf, depth, status)
+            VALUES (?, ?, ?, ?, ?, ?)
             """,
-            (url, depth),
+            rows,
         )
-        await self._maybe_commit()
 
     async def is_visited(self, url):
-        async with self.conn.execute(
-            "SELECT 1 FROM visited WHERE url = ? LIMIT 1",
-            (url,),
-        ) as cur:
-            return await cur.fetchone() is not None
+        fp, *parts = await self._encode(url)
+        claim = self._claims.get(fp)
+        if claim is not None:
+            row = tuple(claim[:3])
+        else:
+            async with self.conn.execute(
+                "SELECT host_id, dir_id, leaf FROM visited WHERE fp = ?", (fp,)
+            ) as cur:
+                row = await cur.fetchone()
+            if row is None:
+                return False
+        if tuple(row) != tuple(parts):
+            # not this URL: it cannot be stored, so it is skipped
+            self._collision(url)
+        return True
+
+    def _collision(self, url):
+        """
+        Two URLs share a 64-bit fingerprint; the second one has no row of
+        its own and is not crawled. Reported once per URL.
+        """
+        if url in self._collided:
+            return
+        self._collided.add(url)
+        self.fp_collisions += 1
+        print(f"[SQLite] Fingerprint collision #{self.fp_collisions}, skipping: {url}")
 
     # ---------------- Export support ----------------
 
     async def fetch_visited_since(self, last_id, limit):
         async with self.conn.execute(
             """
-            SELECT id, url
-            FROM visited
-            WHERE id > ?
-            ORDER BY id
+            SELECT v.id, h.host || d.dir || v.leaf
+            FROM visited v
+            JOIN hosts h ON h.id = v.host_id
+            JOIN dirs d ON d.id = v.dir_id
+            WHERE v.id > ?
+            ORDER BY v.id
             LIMIT ?
             """,
             (last_id, limit),
@@ -119,16 +361,173 @@ class AsyncSQLiteStore:
             return await cur.fetchall()
     # ---------------- Error logging ----------------
     
-    async def log_error(self, url, error_type, message):
-        await self.conn.execute(
+    async def log_error(
+        self,
+        url,
+        error_type,
+        message,
+        status=None,
+        exception=None,
+        rtt_ms=None,
+        attempt=None,
+    ):
+        """
+        Buffered: rows are written in batches by flush_outcomes().
+        """
+        _, host_id, dir_id, leaf = await self._encode(url)
+        self._error_rows.append(
+            (host_id, dir_id, leaf, error_type, message, status, exception, rtt_ms, attempt)
+        )
+        if len(self._error_rows) >= self.outcome_batch_size:
+            await self.flush_outcomes()
+
+    async def record_outcome(self, url, status, rtt, exception=None, attempt=1):
+        """
+        Count one fetch outcome in the per-minute rollup; failures (no
+        response or non-200) also get an errors row.
+        """
+        host_id = await self._host_id(split_url(url)[0])
+        rtt_ms = round(rtt * 1000, 2)
+
+        key = (int(time.time()) // 60 * 60, host_id, status or 0)
+        counts = self._rollup.get(key)
+        if counts is None:
+            counts = self._rollup[key] = [0, 0.0]
+        counts[0] += 1
+        counts[1] += rtt_ms
+
+        self._outcomes += 1
+        if exception is not None:
+            # aiohttp timeouts stringify to ""
+            exc_name = type(exception).__name__
+            message = (str(exception) or exc_name)[:500]
+        else:
+            exc_name = None
+            message = f"HTTP {status}"
+
+        if exception is not None or status != 200:
+            await self.log_error(
+                url,
+                error_type="fetch_failed",
+                message=message,
+                status=status,
+                exception=exc_name,
+                rtt_ms=rtt_ms,
+                attempt=attempt,
+            )
+        elif self._outcomes >= self.outcome_batch_size:
+            await self.flush_outcomes()
+
+    async def flush_outcomes(self):
+        rows, self._error_rows = self._error_rows, []
+        rollup, self._rollup = self._rollup, {}
+        self._outcomes = 0
+
+        if rows:
+            await self.conn.executemany(
+                """
+                INSERT INTO errors(
+                    host_id, dir_id, leaf, error_type, message, status, exception,
+                    rtt_ms, attempt
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                rows,
+            )
+        if rollup:
+            await self.conn.executemany(
+                """
+                INSERT INTO outcome_rollup(minute, host_id, status, responses, rtt_ms_sum)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(minute, host_id, status) DO UPDATE SET
+                    responses = responses + excluded.responses,
+                    rtt_ms_sum = rtt_ms_sum + excluded.rtt_ms_sum
+                """,
+                [(*key, n, rtt_sum) for key, (n, rtt_sum) in rollup.items()],
+            )
+        if rows or rollup:
+            await self._maybe_commit()
+
+    async def error_hotspots(self, minutes=5, limit=5):
+        """
+        Top (host, status, failures, avg_rtt_ms) over the last `minutes`,
+        read from the rollup rather than the errors table. Outcomes still
+        buffered are merged in without flushing them.
+        """
+        since = int(time.time()) // 60 * 60 - (minutes - 1) * 60
+        totals = {}
+        async with self.conn.execute(
             """
-            INSERT INTO errors(url, error_type, message)
-            VALUES (?, ?, ?)
+            SELECT host_id, status, SUM(responses), SUM(rtt_ms_sum)
+            FROM outcome_rollup
+            WHERE minute >= ? AND status != 200
+            GROUP BY host_id, status
             """,
-            (url, error_type, message),
+            (since,),
+        ) as cur:
+            async for host_id, status, n, rtt_sum in cur:
+                totals[host_id, status] = [n, rtt_sum]
+
+        for (minute, host_id, status), (n, rtt_sum) in self._rollup.items():
+            if minute < since or status == 200:
+                continue
+            counts = totals.setdefault((host_id, status), [0, 0.0])
+            counts[0] += n
+            counts[1] += rtt_sum
+
+        top = sorted(totals.items(), key=lambda item: item[1][0], reverse=True)
+        return [
+            (await self._host(host_id), status, n, rtt_sum / n)
+            for (host_id, status), (n, rtt_sum) in top[:limit]
+        ]
+
+    # ---------------- Link graph ----------------
+
+    async def add_edges(self, src_url, dst_urls):
+        """
+        Buffer src -> dst links as fingerprint pairs; written in batches.
+        No-op unless the store was created with record_edges=True.
+        """
+        if not self.record_edges:
+            return
+
+        src = url_fingerprint(src_url)
+        self._edges.extend((src, url_fingerprint(dst)) for dst in dst_urls)
+
+        if len(self._edges) >= self.edge_batch_size:
+            await self.flush_edges()
+
+    async def flush_edges(self):
+        if not self._edges:
+            return
+
+        edges, self._edges = self._edges, []
+        await self.conn.executemany(
+            "INSERT OR IGNORE INTO edges(src, dst) VALUES (?, ?)", edges
         )
         await self._maybe_commit()
 
+    # ---------------- Extracted page data ----------------
+
+    async def add_page_data(self, url, data):
+        """
+        Buffer one processor-pipeline record; written in batches.
+        """
+        self._page_data.append(
+            (url_fingerprint(url), json.dumps(data, ensure_ascii=False))
+        )
+        if len(self._page_data) >= self.page_batch_size:
+            await self.flush_page_data()
+
+    async def flush_page_data(self):
+        if not self._page_data:
+            return
+
+        rows, self._page_data = self._page_data, []
+        await self.conn.executemany(
+            "INSERT OR REPLACE INTO page_data(fp, data) VALUES (?, ?)", rows
+        )
+        await self._maybe_commit()
 
     # ---------------- Commit & shutdown ----------------
 
@@ -138,6 +537,25 @@ class AsyncSQLiteStore:
             await self.conn.commit()
             self.pending = 0
 
+    async def release_memory(self):
+        """
+        Flush pending writes and drop SQLite's page cache; the queue and
+        visited set stay on disk.
+        """
+        await self.flush_outcomes()
+        await self.flush_visited()
+        await self.flush_page_data()
+        await self.conn.commit()
+        self.pending = 0
+        await self.conn.execute("PRAGMA shrink_memory;")
+
     async def close(self):
+        await self.flush_visited()
+        await self.flush_page_data()
+        # claims interrupted before their ack (status None if before the fetch)
+        claims, self._claims = self._claims, {}
+        await self._write_visited([(fp, *claim) for fp, claim in claims.items()])
+        await self.flush_edges()
+        await self.flush_outcomes()
         await self.conn.commit()
         await self.conn.close()
@@ -1,5 +1,8 @@
 import os
+import gzip
 import json
+import time
+import asyncio
 import aiosqlite
 from datetime import datetime
 
@@ -39,10 +42,12 @@ class URLBatchExporter:
         async with aiosqlite.connect(self.db_path) as db:
             cursor = await db.execute(
                 """
-                SELECT id, url
-                FROM visited
-                WHERE id > ?
-                ORDER BY id
+                SELECT v.id, h.host || d.dir || v.leaf
+                FROM visited v
+                JOIN hosts h ON h.id = v.host_id
+                JOIN dirs d ON d.id = v.dir_id
+                WHERE v.id > ?
+                ORDER BY v.id
                 LIMIT ?
                 """,
                 (self.last_id, self.batch_size),
@@ -64,3 +69,342 @@ class URLBatchExporter:
         self._save_state()
         print(f"[EXPORT] Wrote {len(rows)} URLs → {path}")
         return True
+
+
+# -------------------------------------------------
+# STREAMING EXPORTER
+# -------------------------------------------------
+
+EXPORT_COLUMNS = (
+    "id", "url", "depth", "visited_at", "status", "indegree", "pagerank", "page",
+)
+
+
+def _record(row):
+    record = dict(zip(EXPORT_COLUMNS, row))
+    # processor output is stored as JSON text; nest it as an object
+    if record["page"] is not None:
+        record["page"] = json.loads(record["page"])
+    return record
+
+
+class _JSONLWriter:
+    """
+    Compressed JSON-lines writer (gzip or zstd).
+    """
+
+    def __init__(self, path, codec):
+        self._raw = open(path, "wb")
+        if codec == "zstd":
+            import zstandard
+
+            self._stream = zstandard.ZstdCompressor(level=3).stream_writer(
+                self._raw, closefd=False
+            )
+        else:
+            self._stream = gzip.GzipFile(fileobj=self._raw, mode="wb", compresslevel=6)
+
+    def write_rows(self, rows):
+        lines = "".join(
+            json.dumps(_record(row), ensure_ascii=False) + "\n" for row in rows
+        )
+        self._stream.write(lines.encode("utf-8"))
+
+    def size(self):
+        # compressed bytes already flushed to disk
+        return self._raw.tell()
+
+    def close(self):
+        self._stream.close()
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+        self._raw.close()
+
+
+class _ParquetWriter:
+    """
+    Columnar writer; each write_rows() call becomes one row group.
+    """
+
+    def __init__(self, path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self._schema = pa.schema([
+            ("id", pa.int64()),
+            ("url", pa.string()),
+            ("depth", pa.int32()),
+            ("visited_at", pa.string()),
+            ("status", pa.int32()),
+            ("indegree", pa.int64()),
+            ("pagerank", pa.float64()),
+            ("page", pa.string()),      # processor output, JSON text
+        ])
+        self._raw = open(path, "wb")
+        self._writer = pq.ParquetWriter(self._raw, self._schema, compression="zstd")
+
+    def write_rows(self, rows):
+        columns = list(zip(*rows))
+        table = self._pa.Table.from_arrays(
+            [self._pa.array(col, type=field.type)
+             for col, field in zip(columns, self._schema)],
+            schema=self._schema,
+        )
+        self._writer.write_table(table)
+
+    def size(self):
+        return self._raw.tell()
+
+    def close(self):
+        self._writer.close()
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+        self._raw.close()
+
+
+class StreamingExporter:
+    """
+    Streams visited rows over a single read-only connection into
+    compressed files rotated by size or, with max_file_age, by age.
+
+    Files are written as `.part` and renamed on rotation; the cursor in
+    `state_file` only advances after a file is complete, so a crash
+    re-exports at most the unfinished file (its `.part` is removed on the
+    next connect).
+    """
+
+    EXTENSIONS = {
+        "jsonl.gz": ".jsonl.gz",
+        "jsonl.zst": ".jsonl.zst",
+        "parquet": ".parquet",
+    }
+
+    def __init__(
+        self,
+        db_path,
+        out_dir="exports",
+        fmt="jsonl.gz",
+        max_file_bytes=64 * 1024 * 1024,
+        chunk_size=5000,
+        scan_size=100_000,
+        poll_interval=2.0,
+        state_file="exports/stream_state.json",
+        max_file_age=None,
+    ):
+        if fmt not in self.EXTENSIONS:
+            raise ValueError(f"Unsupported export format: {fmt}")
+
+        self.db_path = db_path
+        self.out_dir = out_dir
+        self.fmt = fmt
+        self.max_file_bytes = max_file_bytes
+        self.max_file_age = max_file_age      # seconds; None = size only
+        self.chunk_size = chunk_size
+        self.scan_size = scan_size
+        self.poll_interval = poll_interval
+        self.state_file = state_file
+
+        os.makedirs(out_dir, exist_ok=True)
+
+        state = self._load_state()
+        self.last_id = state.get("last_id", 0)
+        self.file_counter = state.get("file_counter", 0)
+
+        self.session_id = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        self.conn = None
+
+        self._writer = None
+        self._part_path = None
+        self._opened_at = 0.0
+        self._pending_last_id = self.last_id
+        self._pending_rows = 0
+
+    # ---------------- State ----------------
+
+    def _load_state(self):
+        if os.path.exists(self.state_file):
+            with open(self.state_file, "r") as f:
+                return json.load(f)
+        return {}
+
+    def _save_state(self):
+        tmp = self.state_file + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(
+                {"last_id": self.last_id, "file_counter": self.file_counter}, f
+            )
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.state_file)
+
+    # ---------------- Connection ----------------
+
+    async def connect(self):
+        self._sweep_parts()
+        self.conn = await aiosqlite.connect(
+            f"file:{self.db_path}?mode=ro", uri=True
+        )
+        async with self.conn.execute("PRAGMA table_info(visited)") as cur:
+            columns = {row[1] for row in await cur.fetchall()}
+
+        async with self.conn.execute(
+            "SELECT name FROM sqlite_master WHERE name IN ('page_scores', 'page_data')"
+        ) as cur:
+            tables = {row[0] for row in await cur.fetchall()}
+
+        if "host_id" in columns:
+            if "dir_id" in columns:
+                url = "h.host || d.dir || v.leaf"
+                joins = "JOIN dirs d ON d.id = v.dir_id\n"
+            else:
+                # compact schema from before the directory dictionary
+                url, joins = "h.host || v.path", ""
+            scores = "s.indegree, s.pagerank" if "page_scores" in tables else "NULL, NULL"
+            page = "p.data" if "page_data" in tables else "NULL"
+            joins += "".join((
+                "LEFT JOIN page_scores s ON s.fp = v.fp\n" if "page_scores" in tables else "",
+                "LEFT JOIN page_data p ON p.fp = v.fp\n" if "page_data" in tables else "",
+            ))
+            self._query = f"""
+                SELECT v.id, {url}, v.depth, v.visited_at, v.status,
+                       {scores}, {page}
+                FROM visited v
+                JOIN hosts h ON h.id = v.host_id
+                {joins}
+                WHERE v.id > ?
+                ORDER BY v.id
+                LIMIT ?
+            """
+        else:
+            # database not yet migrated to the compact schema
+            status = "status" if "status" in columns else "NULL"
+            self._query = f"""
+                SELECT id, url, depth, visited_at, {status}, NULL, NULL, NULL
+                FROM visited
+                WHERE id > ?
+                ORDER BY id
+                LIMIT ?
+            """
+
+    def _sweep_parts(self):
+        # left by a crash; the cursor never moved past their rows, so they
+        # are exported again into new files
+        suffixes = tuple(ext + ".part" for ext in self.EXTENSIONS.values())
+        for name in os.listdir(self.out_dir):
+            if name.endswith(suffixes):
+                os.remove(os.path.join(self.out_dir, name))
+                print(f"[EXPORT] Removed unfinished file {name}")
+
+    async def close(self):
+        self._finish_file()
+        if self.conn:
+            await self.conn.close()
+            self.conn = None
+
+    async def _data_version(self):
+        # changes whenever another connection commits to the database
+        async with self.conn.execute("PRAGMA data_version") as cur:
+            return (await cur.fetchone())[0]
+
+    # ---------------- Files ----------------
+
+    def _open_file(self):
+        self.file_counter += 1
+        filename = (
+            f"{self.session_id}_part_{self.file_counter:05d}"
+            f"{self.EXTENSIONS[self.fmt]}"
+        )
+        self._part_path = os.path.join(self.out_dir, filename) + ".part"
+        self._opened_at = time.monotonic()
+
+        if self.fmt == "parquet":
+            self._writer = _ParquetWriter(self._part_path)
+        else:
+            codec = "zstd" if self.fmt == "jsonl.zst" else "gzip"
+            self._writer = _JSONLWriter(self._part_path, codec)
+
+    def _finish_file(self):
+        if not self._writer:
+            return
+
+        self._writer.close()
+        final_path = self._part_path[: -len(".part")]
+        os.replace(self._part_path, final_path)
+
+        self.last_id = self._pending_last_id
+        self._save_state()
+        print(f"[EXPORT] Wrote {self._pending_rows} URLs → {final_path}")
+
+        self._writer = None
+        self._part_path = None
+        self._pending_rows = 0
+
+    def _write_chunk(self, rows):
+        if not self._writer:
+            self._open_file()
+
+        self._writer.write_rows(rows)
+        self._pending_last_id = rows[-1][0]
+        self._pending_rows += len(rows)
+
+        if self._writer.size() >= self.max_file_bytes or self._expired():
+            self._finish_file()
+
+    def _expired(self):
+        return (
+            self._writer is not None
+            and self.max_file_age is not None
+            and time.monotonic() - self._opened_at >= self.max_file_age
+        )
+
+    # ---------------- Export ----------------
+
+    async def _drain(self):
+        """
+        Stream every row past the cursor. Returns the number of rows written.
+        """
+        total = 0
+        while True:
+            scanned = 0
+            chunk = []
+            async with self.conn.execute(
+                self._query, (self._pending_last_id, self.scan_size)
+            ) as cur:
+                async for row in cur:
+                    chunk.append(row)
+                    scanned += 1
+                    if len(chunk) >= self.chunk_size:
+                        self._write_chunk(chunk)
+                        chunk = []
+
+            if chunk:
+                self._write_chunk(chunk)
+
+            total += scanned
+            if scanned < self.scan_size:
+                return total
+
+    async def run(self, follow=False):
+        if self.conn is None:
+            await self.connect()
+
+        try:
+            while True:
+                version = await self._data_version()
+                written = await self._drain()
+
+                if not follow:
+                    break
+
+                if written == 0:
+                    # idle: keep the open file, it is only published once
+                    # it reaches max_file_bytes or max_file_age (or on exit)
+                    while await self._data_version() == version:
+                        if self._expired():
+                            self._finish_file()
+                        await asyncio.sleep(self.poll_interval)
+        finally:
+            await self.close()
+
+        print("[EXPORT] No new URLs. Done.")
@@ -0,0 +1,149 @@
+import asyncio
+import gc
+import os
+import resource
+
+
+def current_rss_bytes():
+    """
+    Resident set size of this process (Linux /proc), falling back to the
+    peak RSS from getrusage on platforms without /proc.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class ResourceGovernor:
+    """
+    Keeps the crawler inside memory budgets.
+
+    - RSS / in-flight bytes over budget: only min_workers may take new work
+      (each fetch reserves fetch_reserve bytes up front, then its body size)
+    - frontier above soft limit: only links at depth <= keep_depth are kept
+    - frontier at hard limit: all newly discovered links are dropped
+
+    Any budget left as None is not enforced.
+    """
+
+    def __init__(
+        self,
+        max_rss_mb=None,
+        max_frontier=None,
+        max_inflight_mb=None,
+        fetch_reserve_kb=512,
+        soft_ratio=0.8,
+        keep_depth=2,
+        min_workers=1,
+        interval=1.0,
+    ):
+        self.max_rss = max_rss_mb * 2**20 if max_rss_mb else None
+        self.max_frontier = max_frontier
+        self.max_inflight = max_inflight_mb * 2**20 if max_inflight_mb else None
+        self.fetch_reserve = fetch_reserve_kb * 1024 if self.max_inflight else 0
+        self.soft_ratio = soft_ratio
+        self.keep_depth = keep_depth
+        self.min_workers = min_workers
+        self.interval = interval
+
+        self.rss = current_rss_bytes()
+        self.frontier = 0
+        self.inflight = 0
+        self.active = 0
+
+        self.dropped_links = 0
+        self.throttle_events = 0
+
+        self._throttled = False
+        self._changed = asyncio.Event()
+
+    # ---------------- Worker slots ----------------
+
+    def _over_budget(self):
+        if self.max_rss and self.rss >= self.max_rss:
+            return True
+        if self.max_inflight and self.inflight >= self.max_inflight:
+            return True
+        return False
+
+    def _state_changed(self):
+        over = self._over_budget()
+        if over and not self._throttled:
+            self.throttle_events += 1
+        self._throttled = over
+        self._changed.set()
+
+    async def acquire_slot(self):
+        # no await between the check and wait(), so no wakeup is lost
+        while self._over_budget() and self.active >= self.min_workers:
+            self._changed.clear()
+            await self._changed.wait()
+        self.active += 1
+
+    def release_slot(self):
+        self.active -= 1
+        self._changed.set()
+
+    # ---------------- In-flight bytes ----------------
+
+    def reserve(self, nbytes):
+        self.inflight += nbytes
+        self._state_changed()
+
+    def release(self, nbytes):
+        self.inflight -= nbytes
+        self._state_changed()
+
+    # ---------------- Frontier ----------------
+
+    def allow_link(self, depth):
+        if not self.max_frontier:
+            return True
+
+        if self.frontier >= self.max_frontier:
+            allowed = False
+        elif self.frontier >= self.max_frontier * self.soft_ratio:
+            allowed = depth <= self.keep_depth
+        else:
+            allowed = True
+
+        if not allowed:
+            self.dropped_links += 1
+        return allowed
+
+    def note_enqueued(self, count=1):
+        # keeps the estimate honest between update() calls
+        self.frontier += count
+
+    # ---------------- Periodic refresh ----------------
+
+    def update(self, frontier):
+        """
+        Refresh measurements. Returns True when RSS is over budget so the
+        caller can release caches.
+        """
+        self.frontier = frontier
+        self.rss = current_rss_bytes()
+
+        over_rss = bool(self.max_rss and self.rss >= self.max_rss)
+        if over_rss:
+            gc.collect()
+
+        self._state_changed()
+        return over_rss
+
+    def headroom(self):
+        """
+        Fraction of each budget still free (None = not enforced).
+        """
+        def free(used, limit):
+            return round(max(0.0, 1 - used / limit), 3) if limit else None
+
+        return {
+            "rss": free(self.rss, self.max_rss),
+            "frontier": free(self.frontier, self.max_frontier),
+            "inflight": free(self.inflight, self.max_inflight),
+        }
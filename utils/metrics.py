@@ -1,4 +1,5 @@
 import time
+import random
 import asyncio
 
 
@@ -27,3 +28,41 @@ class Metrics:
 
     def uptime(self):
         return int(time.time() - self.start_time)
+
+
+class StageTimer:
+    """
+    Per-stage latency samples (dequeue, fetch, parse, ...).
+
+    Keeps a bounded reservoir per stage so long crawls use constant memory.
+    """
+
+    def __init__(self, reservoir=10_000, seed=0):
+        self.reservoir = reservoir
+        self._samples = {}
+        self._counts = {}
+        self._rng = random.Random(seed)
+
+    def observe(self, stage, seconds):
+        samples = self._samples.setdefault(stage, [])
+        count = self._counts.get(stage, 0) + 1
+        self._counts[stage] = count
+
+        if len(samples) < self.reservoir:
+            samples.append(seconds)
+        else:
+            slot = self._rng.randrange(count)
+            if slot < self.reservoir:
+                samples[slot] = seconds
+
+    def summary(self):
+        out = {}
+        for stage, samples in self._samples.items():
+            ordered = sorted(samples)
+            n = len(ordered)
+            out[stage] = {
+                "count": self._counts[stage],
+                "p50_ms": round(ordered[n // 2] * 1000, 3),
+                "p99_ms": round(ordered[min(n - 1, int(n * 0.99))] * 1000, 3),
+            }
+        return out
@@ -0,0 +1,157 @@
+import sqlite3
+import time
+
+
+def _require_numpy():
+    try:
+        import numpy as np
+        import scipy.sparse as sp
+    except ImportError as e:
+        raise SystemExit(
+            "PageRank needs numpy and scipy: pip install numpy scipy"
+        ) from e
+    return np, sp
+
+
+class PageRankJob:
+    """
+    Offline / incremental link-graph scoring over the `edges` table.
+
+    Writes in-degree and PageRank per URL fingerprint into `page_scores`
+    and copies the scores onto queued URLs as frontier priorities; URLs
+    enqueued later pick their score up from `page_scores` on insert.
+    Re-runs warm-start from the previous scores and are skipped when
+    no edges were added since the last run.
+    """
+
+    def __init__(
+        self,
+        db_path,
+        damping=0.85,
+        tol=1e-6,
+        max_iter=100,
+        chunk_size=500_000,
+    ):
+        self.db_path = db_path
+        self.damping = damping
+        self.tol = tol
+        self.max_iter = max_iter
+        self.chunk_size = chunk_size
+
+    # ---------------- Loading ----------------
+
+    def _load_edges(self, conn, np):
+        srcs, dsts = [], []
+        cur = conn.execute("SELECT src, dst FROM edges")
+        while True:
+            rows = cur.fetchmany(self.chunk_size)
+            if not rows:
+                break
+            pairs = np.array(rows, dtype=np.int64)
+            srcs.append(pairs[:, 0])
+            dsts.append(pairs[:, 1])
+
+        if not srcs:
+            return np.empty(0, np.int64), np.empty(0, np.int64)
+        return np.concatenate(srcs), np.concatenate(dsts)
+
+    def _previous_scores(self, conn, nodes, np):
+        rows = conn.execute("SELECT fp, pagerank FROM page_scores").fetchall()
+        if not rows:
+            return None
+
+        # fingerprints are full 64-bit: never route them through float64
+        fps = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+        ranks = np.fromiter((r[1] for r in rows), dtype=np.float64, count=len(rows))
+        order = np.argsort(fps)
+        fps, ranks = fps[order], ranks[order]
+
+        # nodes is sorted (np.unique), so a searchsorted join is enough
+        pos = np.clip(np.searchsorted(fps, nodes), 0, len(fps) - 1)
+        hit = fps[pos] == nodes
+        start = np.where(hit, ranks[pos], 0.0)
+
+        # new nodes start at the mean score
+        start[~hit] = 1.0 / len(nodes)
+        return start / start.sum()
+
+    # ---------------- Scoring ----------------
+
+    def _pagerank(self, n, src_idx, dst_idx, start, np, sp):
+        outdeg = np.bincount(src_idx, minlength=n).astype(np.float64)
+        weights = 1.0 / outdeg[src_idx]
+
+        # M[dst, src] = 1 / outdeg(src)
+        M = sp.csr_matrix((weights, (dst_idx, src_idx)), shape=(n, n))
+        dangling = outdeg == 0
+
+        rank = start if start is not None else np.full(n, 1.0 / n)
+        teleport = (1.0 - self.damping) / n
+
+        i = 0
+        for i in range(1, self.max_iter + 1):
+            leaked = self.damping * rank[dangling].sum() / n
+            new = self.damping * (M @ rank) + leaked + teleport
+            delta = np.abs(new - rank).sum()
+            rank = new
+            if delta < self.tol:
+                break
+
+        return rank, i
+
+    # ---------------- Job ----------------
+
+    def run(self, force=False):
+        np, sp = _require_numpy()
+        started = time.time()
+
+        conn = sqlite3.connect(self.db_path, timeout=60)
+        try:
+            edge_count = conn.execute("SELECT COUNT(*) FROM edges").fetchone()[0]
+            row = conn.execute(
+                "SELECT value FROM graph_meta WHERE key = 'edges_scored'"
+            ).fetchone()
+            if not force and row and row[0] == edge_count:
+                print(f"[PAGERANK] No new edges since last run ({edge_count}). Skipping.")
+                return False
+
+            src, dst = self._load_edges(conn, np)
+            if len(src) == 0:
+                print("[PAGERANK] Edge table is empty. Crawl with --link-graph first.")
+                return False
+
+            nodes, inverse = np.unique(np.concatenate([src, dst]), return_inverse=True)
+            n = len(nodes)
+            src_idx, dst_idx = inverse[: len(src)], inverse[len(src):]
+
+            start = self._previous_scores(conn, nodes, np)
+            rank, iterations = self._pagerank(n, src_idx, dst_idx, start, np, sp)
+            indegree = np.bincount(dst_idx, minlength=n)
+
+            conn.execute("DELETE FROM page_scores")
+            conn.executemany(
+                "INSERT INTO page_scores(fp, indegree, pagerank) VALUES (?, ?, ?)",
+                zip(nodes.tolist(), indegree.tolist(), rank.tolist()),
+            )
+
+            # feed scores back as frontier priorities (new URLs get theirs on enqueue)
+            conn.execute("""
+                UPDATE queue
+                SET priority = COALESCE(
+                    (SELECT pagerank FROM page_scores s WHERE s.fp = queue.fp), 0
+                )
+            """)
+
+            conn.execute(
+                "INSERT OR REPLACE INTO graph_meta(key, value) VALUES ('edges_scored', ?)",
+                (edge_count,),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+        print(
+            f"[PAGERANK] nodes={n} edges={len(src)} iterations={iterations} "
+            f"warm_start={start is not None} took={time.time() - started:.1f}s"
+        )
+        return True
@@ -0,0 +1,42 @@
+from urllib.parse import urlparse
+
+
+def load_seeds(path):
+    """
+    Read a seed file: one URL or bare domain per line, '#' starts a comment.
+    Bare domains become https://<domain>/.
+    """
+    seeds = []
+    seen = set()
+
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            entry = line.split("#", 1)[0].strip()
+            if not entry:
+                continue
+            if "://" not in entry:
+                entry = f"https://{entry}/"
+            if entry not in seen:
+                seen.add(entry)
+                seeds.append(entry)
+
+    return seeds
+
+
+def seed_hosts(seeds):
+    """
+    Exact-host rules covering every seed.
+    """
+    return {urlparse(url).netloc.lower() for url in seeds}
+
+
+def load_host_rules(path):
+    """
+    Read allowed-host rules (see core.policies.HostScope), one per line.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        return [
+            rule
+            for rule in (line.split("#", 1)[0].strip() for line in f)
+            if rule
+        ]
@@ -0,0 +1,38 @@
+import hashlib
+from array import array
+
+
+class CountMinSketch:
+    """
+    Fixed-memory approximate counter (depth x width uint32 cells).
+
+    Estimates never undercount; with conservative update the overcount
+    stays around total / width. 4 x 2**18 cells = 4 MiB regardless of
+    how many distinct keys are counted.
+    """
+
+    def __init__(self, width=2**18, depth=4):
+        self.width = width
+        self.depth = depth
+        self.rows = [array("I", bytes(4 * width)) for _ in range(depth)]
+
+    def _cells(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.width for i in range(self.depth)]
+
+    def estimate(self, key):
+        return min(row[c] for row, c in zip(self.rows, self._cells(key)))
+
+    def add(self, key, count=1):
+        """
+        Conservative update: only the cells at the current minimum grow.
+        Returns the new estimate.
+        """
+        cells = self._cells(key)
+        target = min(row[c] for row, c in zip(self.rows, cells)) + count
+        for row, c in zip(self.rows, cells):
+            if row[c] < target:
+                row[c] = target
+        return target